@@ -0,0 +1,94 @@
+"""
+Misst /friends/list und /friends/online gegen eine Datenbank mit vielen Usern,
+im Vergleich zur früheren Variante mit einer Abfrage pro Freund (N+1).
+
+    python bench/bench_friends_list.py [users] [repeats]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_FILE = os.path.join(tempfile.mkdtemp(), "friends_bench.db")
+os.environ["FRIENDS_DB"] = DB_FILE
+
+import sqlite3
+from fastapi import Depends
+from fastapi.testclient import TestClient
+
+import friends_server
+from friends_seed import seed
+
+FRIEND_COUNTS = [10, 100, 1000, 5000]
+
+def legacy_list_friends(user: str = Depends(friends_server.get_user_by_token)):
+    # Frühere Variante: Freunde holen, dann pro Freund eine eigene Abfrage
+    with sqlite3.connect(DB_FILE) as conn:
+        c = conn.cursor()
+        c.execute("SELECT friend FROM friends WHERE user = ?", (user,))
+        friends = [row[0] for row in c.fetchall()]
+        threshold = time.time() - friends_server.ONLINE_SECONDS
+        result = []
+        for friend in friends:
+            c.execute("SELECT last_seen_ts, last_ip FROM users WHERE name = ?", (friend,))
+            row = c.fetchone()
+            online = bool(row and row[0] and row[0] > threshold)
+            result.append({"name": friend, "online": online, "ip": row[1] if online else None})
+    return {"friends": result}
+
+def sql_only(user, repeats):
+    # Nur die Datenbankzeit: N+1-Abfragen gegen den einen JOIN
+    threshold = time.time() - friends_server.ONLINE_SECONDS
+    with sqlite3.connect(DB_FILE) as conn:
+        c = conn.cursor()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            friends = [row[0] for row in c.execute("SELECT friend FROM friends WHERE user = ?", (user,))]
+            for friend in friends:
+                c.execute("SELECT last_seen_ts, last_ip FROM users WHERE name = ?", (friend,)).fetchone()
+        legacy = (time.perf_counter() - start) / repeats * 1000
+        start = time.perf_counter()
+        for _ in range(repeats):
+            c.execute("""
+                SELECT f.friend, COALESCE(u.last_seen_ts > ?, 0), u.last_ip
+                FROM friends f LEFT JOIN users u ON u.name = f.friend
+                WHERE f.user = ?
+            """, (threshold, user)).fetchall()
+        joined = (time.perf_counter() - start) / repeats * 1000
+    return legacy, joined
+
+def timed(client, path, token, repeats):
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get(path, headers=headers).raise_for_status()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        client.get(path, headers=headers).raise_for_status()
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    names = seed(DB_FILE, users=users, friends_per_user=20)
+    with sqlite3.connect(DB_FILE) as conn:
+        for count in FRIEND_COUNTS:
+            probe = f"probe{count}"
+            conn.execute("INSERT OR REPLACE INTO users (name, token) VALUES (?, ?)", (probe, f"token-{probe}"))
+            conn.executemany("INSERT OR IGNORE INTO friends (user, friend) VALUES (?, ?)",
+                             ((probe, friend) for friend in names[:count]))
+
+    friends_server.app.get("/bench/legacy_list")(legacy_list_friends)
+    # "with" startet den Lifespan, der die Presence aus der Datenbank lädt
+    with TestClient(friends_server.app) as client:
+        print(f"{users} User, Mittelwert aus {repeats} Requests (ms)")
+        print(f"{'Freunde':>8} {'N+1 list':>10} {'list':>10} {'online':>10} {'SQL N+1':>10} {'SQL JOIN':>10}")
+        for count in FRIEND_COUNTS:
+            token = f"token-probe{count}"
+            legacy = timed(client, "/bench/legacy_list", token, repeats)
+            current = timed(client, "/friends/list", token, repeats)
+            online = timed(client, "/friends/online", token, repeats)
+            sql_legacy, sql_joined = sql_only(f"probe{count}", repeats)
+            print(f"{count:>8} {legacy:>10.2f} {current:>10.2f} {online:>10.2f} {sql_legacy:>10.2f} {sql_joined:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Vergleicht die alte sequentielle Seitenschleife mit hub_client.fetch_all_servers
+gegen einen lokalen Stand-in-Hub.
+
+    python bench/bench_pagination.py [server_count] [latency_s]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hub_client import fetch_server_page, fetch_all_servers, PAGE_SIZE
+from transport import hub_transport
+from stand_in_hub import StandInHub, make_servers
+
+def sequential(base_url):
+    all_servers = []
+    page = 1
+    while True:
+        servers = fetch_server_page(page, base_url)
+        if not servers:
+            break
+        all_servers.extend(servers)
+        if len(servers) < PAGE_SIZE:
+            break
+        page += 1
+    return all_servers
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    servers = make_servers(count)
+    with StandInHub(servers, latency=latency) as hub:
+        start = time.perf_counter()
+        seq = sequential(hub.url)
+        seq_time = time.perf_counter() - start
+        seq_requests = hub.requests
+
+        hub.requests = 0
+        first_page = []
+        start = time.perf_counter()
+        par = fetch_all_servers(hub.url, on_page=lambda batch: first_page.append(time.perf_counter() - start))
+        par_time = time.perf_counter() - start
+        par_requests = hub.requests
+
+    assert seq == servers and par == servers, "Ergebnis weicht ab"
+    print(f"{count} Server, {latency * 1000:.0f} ms Latenz pro Seite")
+    print(f"sequentiell: {seq_time:.2f}s ({seq_requests} Requests)")
+    print(f"parallel:    {par_time:.2f}s ({par_requests} Requests), erste Seite nach {first_page[0]:.2f}s")
+    print(f"Speedup:     {seq_time / par_time:.1f}x")
+    print(f"Transport:   {hub_transport.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Misst einen Ping-Durchlauf (ping_probe.PingProbe) gegen lokale Listener:
+erreichbare Server plus solche, die auf den Verbindungsaufbau nie antworten
+(volles Listen-Backlog, SYNs werden verworfen). Ein Durchlauf sollte etwa
+einen Timeout dauern, nicht einen pro Server. Die gemessenen Pings werden
+mit der Loopback-RTT verglichen, die einzelne blockierende Verbindungen
+ergeben; liegen sie deutlich darüber, misst die Probe Wartezeit im
+Event-Loop mit.
+
+    python bench/bench_ping.py [erreichbar] [haengend] [timeout]
+"""
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ping_probe import PingProbe
+
+def reachable_listener():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    s.listen(512)
+    return s
+
+def hanging_listener():
+    # Backlog 0 und schon belegt: weitere SYNs verwirft der Kernel, der Connect läuft in den Timeout
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    s.listen(0)
+    fillers = []
+    for _ in range(4):
+        c = socket.socket()
+        c.setblocking(False)
+        c.connect_ex(s.getsockname())
+        fillers.append(c)
+    time.sleep(0.05)
+    return s, fillers
+
+def address(sock):
+    host, port = sock.getsockname()
+    return f"{host}:{port}"
+
+def expected_rtt(sock, runs=50):
+    """Median eines einzelnen blockierenden Verbindungsaufbaus in ms, ohne Event-Loop."""
+    times = []
+    for _ in range(runs):
+        c = socket.socket()
+        start = time.perf_counter()
+        c.connect(sock.getsockname())
+        times.append((time.perf_counter() - start) * 1000)
+        c.close()
+        sock.accept()[0].close()
+    times.sort()
+    return times[len(times) // 2]
+
+def main():
+    reachable = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    hanging = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    timeout = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+
+    keep = []
+    addresses = []
+    for _ in range(reachable):
+        s = reachable_listener()
+        keep.append(s)
+        addresses.append(address(s))
+    for _ in range(hanging):
+        s, fillers = hanging_listener()
+        keep.extend([s] + fillers)
+        addresses.append(address(s))
+
+    expected = expected_rtt(keep[0]) if reachable else None
+    probe = PingProbe(timeout=timeout)
+    start = time.perf_counter()
+    results = probe.sweep_blocking(addresses)
+    elapsed = time.perf_counter() - start
+    ok = [ms for ms in results.values() if ms is not None]
+    print(f"{len(addresses)} Server, Timeout {timeout:.1f}s: Durchlauf {elapsed:.2f}s, "
+          f"{len(ok)} erreichbar, {len(results) - len(ok)} ohne Antwort")
+    if ok:
+        ok.sort()
+        median = ok[len(ok) // 2]
+        print(f"Ping min {ok[0]:.2f} ms, Median {median:.2f} ms, max {ok[-1]:.2f} ms")
+        print(f"Erwartet (Loopback-RTT, einzeln gemessen): {expected:.2f} ms, "
+              f"Median liegt {median - expected:+.2f} ms daneben")
+    print(f"Nacheinander wären es mindestens {hanging * timeout:.1f}s allein für die hängenden Server")
+
+    start = time.perf_counter()
+    again = probe.sweep_blocking(addresses)
+    print(f"Zweiter Durchlauf (alles frisch): {len(again)} gemessen, {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for s in keep:
+        s.close()
+
+if __name__ == "__main__":
+    main()
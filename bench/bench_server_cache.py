@@ -0,0 +1,82 @@
+"""
+Vergleicht den alten Server-Cache (servers.json mit indent=2) mit
+server_cache (Kopf + CORE_FIELDS, Rest wird nachgeladen): Dateigröße,
+Zeit bis die Tabelle Daten hat und Zeit bis auch alle übrigen Felder da
+sind. Die Server bekommen zusätzlich Felder wie in den Antworten des
+Hubs; im alten Cache landeten sie alle, server_record behält davon nur
+tier3_cars.
+
+    python bench/bench_server_cache.py [anzahl ...]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server_cache
+from server_record import parse_servers
+from stand_in_hub import make_servers
+
+CARS = [f"car_{i:03d}" for i in range(40)]
+
+def with_extras(servers):
+    for i, s in enumerate(servers):
+        s["description"] = f"No Hesi Traffic Server #{i} - discord.gg/nohesi - Regeln im Discord lesen"
+        s["track"] = {"id": s["map"].lower().replace(" ", "_"), "layout": "default", "version": 3}
+        s["cars"] = CARS[i % 10:i % 10 + 20]
+        s["weather"] = "clear"
+        s["password"] = False
+        if s["type"] == "Tier3":
+            s["tier3_cars"] = CARS[i % 7:i % 7 + 12]
+    return servers
+
+def best_of(fn, runs=5):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def load_legacy(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def touch_all(servers):
+    for s in servers:
+        s.tier3_cars
+    return servers
+
+def main():
+    counts = [int(a) for a in sys.argv[1:]] or [500, 5000, 20000]
+    tmp = tempfile.mkdtemp()
+    print(f"{'Server':>7} {'Format':>8} {'Größe':>10} {'Start':>10} {'komplett':>10} {'Schreiben':>10}")
+    for count in counts:
+        servers = with_extras(make_servers(count))
+        records = parse_servers(servers)
+        legacy = os.path.join(tmp, f"servers_{count}.json")
+        compact = os.path.join(tmp, f"servers_{count}.cache")
+
+        def write_legacy():
+            with open(legacy, "w", encoding="utf-8") as f:
+                json.dump(servers, f, indent=2, ensure_ascii=False)
+
+        write_old, _ = best_of(write_legacy, 3)
+        write_new, _ = best_of(lambda: server_cache.write(compact, records), 3)
+        load_old, loaded = best_of(lambda: load_legacy(legacy))
+        assert loaded == servers
+        load_new, _ = best_of(lambda: server_cache.read(compact))
+        full_new, loaded = best_of(lambda: touch_all(server_cache.read(compact)))
+        assert loaded == records
+
+        for name, path, start, full, write in (("json", legacy, load_old, load_old, write_old),
+                                               ("kompakt", compact, load_new, full_new, write_new)):
+            print(f"{count:>7} {name:>8} {os.path.getsize(path) / 1024:>8.0f}KB "
+                  f"{start * 1000:>8.1f}ms {full * 1000:>8.1f}ms {write * 1000:>8.1f}ms")
+
+if __name__ == "__main__":
+    main()
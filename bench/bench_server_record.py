@@ -0,0 +1,75 @@
+"""
+Vergleicht die rohen API-Dicts (wie bisher überall in main.py) mit
+server_record.Server: Speicher der Liste und die Arbeit pro Zeile beim
+Zeichnen aller Zellen und beim Sortieren nach Tier und Spielern.
+
+    python bench/bench_server_record.py [anzahl]
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server_record import parse_servers
+from bench_server_cache import with_extras
+from stand_in_hub import make_servers
+
+TEXT_FIELDS = ("name", "ip_address", "region", "map", "density", "type")
+
+# Bisheriger Weg über die Dicts (server_model vor server_record)
+def dict_tier(s):
+    if "type" in s and isinstance(s["type"], str) and s["type"].lower().startswith("tier"):
+        return s["type"].replace("Tier", "")
+    elif "tier3_cars" in s:
+        return "3"
+    return ""
+
+def dict_cells(s):
+    vip = s.get("vip_slots", 0)
+    max_vip = s.get("max_vip_slots", 0)
+    return ([s.get(f, "") for f in TEXT_FIELDS]
+            + [f"{s.get('clients', 0)}/{s.get('maxclients', 0)}", dict_tier(s),
+               f"{vip}/{max_vip}" if max_vip else str(vip)])
+
+def record_cells(s):
+    return [getattr(s, f) for f in TEXT_FIELDS] + [s.players_text, s.tier, s.vip_text]
+
+def measure_memory(fn):
+    tracemalloc.start()
+    result = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+def best_of(fn, runs=5):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    # Wie aus der Hub-Antwort: jeder Server ein eigenes, frisch geparstes Dict
+    body = json.dumps(with_extras(make_servers(count)))
+    dict_size, dicts = measure_memory(lambda: json.loads(body))
+    record_size, records = measure_memory(lambda: parse_servers(json.loads(body)))
+    parse = best_of(lambda: parse_servers(dicts))
+
+    print(f"{count} Server")
+    print(f"Speicher: Dicts {dict_size / 1024:.0f} KB, Server {record_size / 1024:.0f} KB "
+          f"({record_size / dict_size:.0%}), Umwandeln {parse * 1000:.1f} ms")
+    for name, servers, cells, tier, players in (
+            ("Dicts", dicts, dict_cells, dict_tier, lambda s: s.get("clients", 0)),
+            ("Server", records, record_cells, lambda s: s.tier, lambda s: s.clients)):
+        render = best_of(lambda: [cells(s) for s in servers])
+        sort = best_of(lambda: (sorted(servers, key=tier), sorted(servers, key=players)))
+        print(f"{name:>7}: alle Zellen {render * 1000:7.1f} ms, sortieren {sort * 1000:6.1f} ms")
+
+if __name__ == "__main__":
+    main()
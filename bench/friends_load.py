@@ -0,0 +1,276 @@
+"""
+Lasttest für friends_server: legt eine Datenbank mit vielen Usern und einem
+Freundesgraphen an, startet den Server (uvicorn als eigener Prozess oder mit
+--in-process im selben Interpreter) und lässt viele gleichzeitige Clients
+eine Mischung aus POST /status, GET /friends/list und GET /friends/online
+schicken. Ausgegeben werden Durchsatz und p50/p95/p99 pro Route; das
+Ergebnis landet zusätzlich als JSON, damit sich Stände vergleichen lassen.
+
+    python bench/friends_load.py [--clients 2000] [--duration 10] [--mix status=70,list=20,online=10]
+    python bench/friends_load.py --app-dir /tmp/alter_stand --compare bench/results/<datei>.json
+
+Mit --app-dir lässt sich ein anderer Stand des Servers (z.B. ein git worktree)
+mit denselben Einstellungen messen.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+sys.path.insert(0, BENCH_DIR)
+from friends_seed import seed
+
+ROUTES = {
+    "status": ("POST", "/status"),
+    "list": ("GET", "/friends/list"),
+    "online": ("GET", "/friends/online"),
+}
+DEFAULT_MIX = "status=70,list=20,online=10"
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_ready(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1)
+            return True
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    return False
+
+class SubprocessServer:
+    """uvicorn als eigener Prozess, Lastgenerator und Server teilen sich keinen GIL."""
+
+    def __init__(self, app_dir, db_file, port):
+        env = dict(os.environ, FRIENDS_DB=db_file)
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "friends_server:app", "--port", str(port),
+             "--log-level", "warning", "--no-access-log", "--timeout-graceful-shutdown", "2"],
+            cwd=app_dir, env=env
+        )
+        if not wait_ready(port):
+            self.proc.kill()
+            raise RuntimeError("Server startet nicht")
+
+    def stop(self):
+        self.proc.terminate()
+        self.proc.wait()
+
+class InProcessServer:
+    """uvicorn in einem Thread dieses Prozesses, ohne Prozessstart (z.B. für Profiling)."""
+
+    def __init__(self, app_dir, db_file, port):
+        import uvicorn
+        os.environ["FRIENDS_DB"] = db_file
+        sys.path.insert(0, app_dir)
+        # friends_seed hat friends_db schon aus diesem Baum geladen, für --app-dir neu importieren
+        for name in [m for m in sys.modules if m.startswith("friends_") and m != "friends_seed"]:
+            del sys.modules[name]
+        import friends_server
+        config = uvicorn.Config(friends_server.app, port=port, log_level="warning",
+                                access_log=False, timeout_graceful_shutdown=2)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        if not wait_ready(port):
+            raise RuntimeError("Server startet nicht")
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(10)
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ROUTES:
+            raise SystemExit(f"Unbekannte Route in --mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+class RawClient:
+    """
+    Minimaler HTTP/1.1-Client mit Keep-Alive auf asyncio-Streams. httpx würde
+    auf einem Rechner mit wenigen Kernen selbst zum Engpass werden.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=b"", headers=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(body)}"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Verbindung geschlossen")
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        data = await self.reader.readexactly(length) if length else b""
+        return status, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+async def client_loop(host, port, token, mix, rnd, deadline, results):
+    client = RawClient(host, port)
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    body = b'{"ip": "10.0.0.1:9600"}'
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    try:
+        while time.perf_counter() < deadline:
+            route = rnd.choices(names, weights)[0]
+            method, path = ROUTES[route]
+            latencies, errors = results[route]
+            start = time.perf_counter()
+            try:
+                status, _ = await client.request(method, path, body if method == "POST" else b"", headers)
+                if status == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors.append(status)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                errors.append(e)
+                client.close()
+                client = RawClient(host, port)
+    finally:
+        client.close()
+
+async def run_load(host, port, tokens, clients, duration, mix, seed_value=1):
+    results = {route: ([], []) for route in mix}
+    rnd = random.Random(seed_value)
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(host, port, tokens[i % len(tokens)], mix,
+                                       random.Random(rnd.random()), deadline, results)
+                           for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+def summarize(latencies, errors, elapsed):
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+def git_revision(path):
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=path,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def print_report(report, baseline=None):
+    print(f"{report['params']['clients']} Clients, {report['elapsed_s']:.1f}s, Stand {report['revision']}")
+    print(f"{'Route':>8} {'req/s':>9} {'Fehler':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, r in report["routes"].items():
+        line = f"{route:>8} {r['rps']:>9.0f} {r['errors']:>7} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}"
+        old = (baseline or {}).get("routes", {}).get(route)
+        if old:
+            # Relative Änderung gegenüber der Vergleichsmessung
+            line += "   vs. {}: req/s {:+.0%}, p95 {:+.0%}".format(
+                baseline.get("revision"),
+                r["rps"] / old["rps"] - 1 if old["rps"] else 0,
+                r["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0)
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app-dir", default=os.path.dirname(BENCH_DIR))
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--friends", type=int, default=20, help="Freunde pro User im Schnitt")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Gewichte pro Route, z.B. status=70,list=20,online=10")
+    parser.add_argument("--in-process", action="store_true", help="uvicorn im selben Prozess starten")
+    parser.add_argument("--output", help="JSON-Datei (Standard: bench/results/friends_load-<stand>-<zeit>.json)")
+    parser.add_argument("--compare", help="frühere JSON-Datei zum Vergleich")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+    app_dir = os.path.abspath(args.app_dir)
+
+    # Vor dem Start anlegen: der Server lädt die Presence beim Hochfahren aus der Datenbank
+    db_file = os.path.join(tempfile.mkdtemp(), "friends_load.db")
+    names = seed(db_file, users=args.users, friends_per_user=args.friends)
+    tokens = [f"token-{name}" for name in names]
+    port = free_port()
+    server = (InProcessServer if args.in_process else SubprocessServer)(app_dir, db_file, port)
+    try:
+        results, elapsed = asyncio.run(run_load("127.0.0.1", port, tokens, args.clients, args.duration, mix))
+    finally:
+        server.stop()
+
+    all_latencies = [l for latencies, _ in results.values() for l in latencies]
+    all_errors = [e for _, errors in results.values() for e in errors]
+    report = {
+        "revision": git_revision(app_dir),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "params": {"users": args.users, "friends": args.friends, "clients": args.clients,
+                   "duration": args.duration, "mix": mix, "in_process": args.in_process},
+        "elapsed_s": round(elapsed, 2),
+        "total": summarize(all_latencies, all_errors, elapsed),
+        "routes": {route: summarize(latencies, errors, elapsed)
+                   for route, (latencies, errors) in results.items()},
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"friends_load-{report['revision'] or 'unbekannt'}-{stamp}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Ergebnis: {output}")
+
+if __name__ == "__main__":
+    main()
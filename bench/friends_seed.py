@@ -0,0 +1,50 @@
+"""
+Legt eine Friends-Datenbank mit vielen Usern und einem Freundesgraphen an.
+"""
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from friends_db import Database
+
+def seed(db_file, users=10000, friends_per_user=50, online_ratio=0.3, seed=1, skew=2.0):
+    """
+    Erzeugt users User (user0 .. userN) mit Token "token-<name>" und im
+    Schnitt friends_per_user Freunden. online_ratio der User haben gerade
+    einen Heartbeat geschickt. Gibt die Liste der Namen zurück.
+    Mit skew (Pareto-Alpha) sind die Freundeszahlen wie in echten Netzen
+    ungleich verteilt: viele User mit wenigen, einige mit sehr vielen
+    Freunden. skew=None verteilt gleichmäßig.
+    Legt das Schema bei Bedarf selbst an, der Server muss nicht laufen.
+    """
+    rnd = random.Random(seed)
+    now = time.time()
+    names = [f"user{i}" for i in range(users)]
+    db = Database(db_file)
+    db.migrate()
+    db.close()
+    with sqlite3.connect(db_file) as conn:
+        c = conn.cursor()
+        c.executemany(
+            "INSERT OR REPLACE INTO users (name, token, last_seen_ts, last_ip) VALUES (?, ?, ?, ?)",
+            ((name, f"token-{name}",
+              now - (rnd.random() * 30 if rnd.random() < online_ratio else 3600),
+              f"10.0.{i // 250}.{i % 250}:9600") for i, name in enumerate(names))
+        )
+        pairs = set()
+        for name in names:
+            # Jede Kante zählt für beide Seiten, daher im Schnitt die Hälfte ziehen
+            if skew:
+                mean = skew / (skew - 1) if skew > 1 else 2
+                count = int(rnd.paretovariate(skew) * friends_per_user / 2 / mean)
+            else:
+                count = friends_per_user // 2
+            for friend in rnd.sample(names, min(count, users)):
+                if friend != name:
+                    pairs.add((name, friend))
+                    pairs.add((friend, name))
+        c.executemany("INSERT OR IGNORE INTO friends (user, friend) VALUES (?, ?)", pairs)
+    return names
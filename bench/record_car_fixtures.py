@@ -0,0 +1,60 @@
+"""
+Zeichnet Antworten des Hubs als Fixture für bench/verify_car_index.py auf:
+die Car-Liste, die komplette Serverliste und für jedes Car die Antwort von
+/servers?car=<model>|<niedrigstes Tier>, alles zum selben Zeitpunkt.
+
+    python bench/record_car_fixtures.py [--limit 50] [--hub https://hub.nohesi.gg]
+
+Landet in bench/fixtures/car_index/<zeit>/ und wird mit eingecheckt.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures", "car_index")
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from hub_client import fetch_all_servers
+from transport import hub_transport
+
+def lowest_tier(car):
+    tiers = sorted(int(k) for k in (car.get("tier") or {}).keys())
+    return tiers[0] if tiers else 0
+
+def get_json(url):
+    response = hub_transport.get(url)
+    response.raise_for_status()
+    return response.json()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hub", default="https://hub.nohesi.gg")
+    parser.add_argument("--limit", type=int, default=0, help="höchstens so viele Cars abfragen (0 = alle)")
+    parser.add_argument("--output", help="Verzeichnis (Standard: bench/fixtures/car_index/<zeit>)")
+    args = parser.parse_args()
+    hub = args.hub.rstrip("/")
+    output = args.output or os.path.join(FIXTURES_DIR, time.strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(output, exist_ok=True)
+
+    cars = get_json(f"{hub}/servers/cars")
+    servers = fetch_all_servers(f"{hub}/servers")
+    models = [c for c in cars.get("data", []) if c.get("available", True) and lowest_tier(c)]
+    if args.limit:
+        models = models[:args.limit]
+    car_servers = {}
+    for car in models:
+        key = f"{car['model']}|{lowest_tier(car)}"
+        data = get_json(f"{hub}/servers?car={key}")
+        car_servers[key] = sorted(s.get("ip_address") for s in data.get("data", {}).get("servers", []))
+        print(f"{key}: {len(car_servers[key])} Server")
+
+    for name, data in (("cars.json", cars), ("servers.json", servers), ("car_servers.json", car_servers)):
+        with open(os.path.join(output, name), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, ensure_ascii=False, sort_keys=name == "car_servers.json")
+    print(f"{len(servers)} Server, {len(car_servers)} Cars -> {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Lokaler Ersatz für hub.nohesi.gg zum Benchmarken.
+Liefert /servers?page=N mit künstlicher Latenz pro Request und ETag/304.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+def make_servers(count):
+    regions = ["EU", "NA", "ASIA", "OCE"]
+    maps = ["SRP", "Shutoko", "LA Canyons"]
+    densities = ["Low", "Medium", "High"]
+    types = ["Tier1", "Tier2", "Tier3", "Public"]
+    return [{
+        "name": f"No Hesi #{i}",
+        "ip_address": f"10.0.{i // 250}.{i % 250}:{8081 + i % 10}",
+        "region": regions[i % len(regions)],
+        "map": maps[i % len(maps)],
+        "density": densities[i % len(densities)],
+        "type": types[i % len(types)],
+        "clients": i % 30,
+        "maxclients": 30,
+        "vip_slots": i % 5,
+        "max_vip_slots": 5,
+    } for i in range(count)]
+
+class StandInHub:
+    def __init__(self, servers, latency=0.05, page_size=10):
+        self.servers = servers
+        self.latency = latency
+        self.page_size = page_size
+        self.requests = 0
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                hub.requests += 1
+                time.sleep(hub.latency)
+                query = parse_qs(urlparse(self.path).query)
+                page = int(query.get("page", ["1"])[0])
+                start = (page - 1) * hub.page_size
+                body = json.dumps({"data": {"servers": hub.servers[start:start + hub.page_size]}}).encode()
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/servers"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,68 @@
+"""
+Prüft car_index.CarIndex gegen aufgezeichnete Hub-Antworten (siehe
+bench/record_car_fixtures.py): pro Car die Server aus dem Index gegen die
+von /servers?car=<model>|<tier>. Verglichen werden nur Server, die auch in
+der aufgezeichneten Serverliste stehen. Exit-Code 1 bei Abweichungen.
+
+fixtures/car_index/synthetic ist von Hand gebaut und deckt jeden Zweig der
+Regel ab (tier3_cars, TierN auch klein geschrieben, Public/ohne Typ, Tier
+ohne Zahl); es prüft also die Umsetzung, nicht ob der Hub so entscheidet.
+Dafür sind die mit record_car_fixtures.py aufgezeichneten Verzeichnisse da.
+
+    python bench/verify_car_index.py [fixture-verzeichnis ...]
+"""
+import json
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures", "car_index")
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from car_index import CarIndex
+from server_record import parse_servers
+
+def load(directory, name):
+    with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def verify(directory):
+    servers = parse_servers(load(directory, "servers.json"))
+    car_servers = load(directory, "car_servers.json")
+    index = CarIndex(servers)
+    known = {s.ip_address for s in servers}
+    by_ip = {s.ip_address: s for s in servers}
+    exact = 0
+    extra_total = missing_total = 0
+    for key, ips in sorted(car_servers.items()):
+        model, _, tier = key.rpartition("|")
+        remote = set(ips) & known
+        indexed = index.lookup(model, int(tier))
+        if indexed == remote:
+            exact += 1
+            continue
+        indexed = indexed or set()
+        extra, missing = indexed - remote, remote - indexed
+        extra_total += len(extra)
+        missing_total += len(missing)
+        # Typ der betroffenen Server zeigt, welcher Teil der Regel nicht stimmt
+        types = sorted({by_ip[ip].type or "-" for ip in extra | missing})
+        print(f"  {key}: {len(extra)} zu viel, {len(missing)} fehlen (Typen: {', '.join(types)})")
+    total = len(car_servers)
+    print(f"{os.path.basename(directory)}: {exact}/{total} Cars exakt, "
+          f"{extra_total} Server zu viel, {missing_total} fehlen")
+    return exact == total
+
+def main():
+    directories = sys.argv[1:]
+    if not directories and os.path.isdir(FIXTURES_DIR):
+        directories = sorted(os.path.join(FIXTURES_DIR, d) for d in os.listdir(FIXTURES_DIR)
+                             if os.path.isdir(os.path.join(FIXTURES_DIR, d)))
+    if not directories:
+        print(f"Keine Fixtures in {FIXTURES_DIR}, erst bench/record_car_fixtures.py ausführen")
+        return 1
+    ok = all([verify(d) for d in directories])
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
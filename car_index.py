@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+class CarIndex:
+    """
+    Beantwortet "auf welchen Servern darf ich mit Car X in Tier T fahren"
+    aus der geladenen Serverliste statt über hub.nohesi.gg/servers?car=X|T.
+
+    Regel (gegen aufgezeichnete API-Antworten prüfbar, siehe
+    bench/verify_car_index.py):
+    - Server mit tier3_cars: nur die dort gelisteten Cars, im Tier des Servers
+    - Server mit Tier im Typ (Tier1, Tier2, ...): alle Cars dieses Tiers
+    - Server ohne Typ bzw. mit Typ ohne Tier (z.B. Public): alle Cars
+    - Server mit Tier, das keine Zahl ist: keine (unbekannt, lieber zu wenig)
+
+    main.py gleicht die Antwort pro Car einmal mit der API ab und nutzt bei
+    einer Abweichung für dieses Car wieder die API.
+
+    Die Gruppen werden erst bei der ersten Abfrage nach einem rebuild()
+    gebildet, tier3_cars aus dem Server-Cache wird also nicht schon beim
+    Start nachgeladen.
+    """
+
+    def __init__(self, servers=(), key="ip_address"):
+        self.key = key
+        self.version = 0
+        self.rebuild(servers)
+
+    def rebuild(self, servers):
+        self._servers = servers
+        self._groups = None
+        self._keys = None
+        self.version += 1
+
+    def keys(self):
+        """Schlüssel aller Server, aus denen der Index gebaut ist."""
+        if self._keys is None:
+            self._keys = {getattr(s, self.key) for s in self._servers}
+        return self._keys
+
+    def _build(self):
+        by_tier = defaultdict(set)        # Tier -> Server ohne Car-Liste
+        by_tier_car = defaultdict(set)    # (Tier, Car) -> Server mit Car-Liste
+        open_servers = set()
+        for s in self._servers:
+            k = getattr(s, self.key)
+            if s.tier3_cars is not None:
+                for car in s.tier3_cars:
+                    by_tier_car[(s.tier, car)].add(k)
+            elif s.tier.isdigit():
+                by_tier[s.tier].add(k)
+            elif not s.tier:
+                open_servers.add(k)
+        self._groups = (by_tier, by_tier_car, open_servers)
+
+    def lookup(self, car_model, tier):
+        """
+        Menge der Server-Schlüssel für car_model in tier oder None, wenn der
+        Index das nicht beantworten kann (Tier unbekannt, noch keine Server).
+        """
+        if not tier or not self._servers:
+            return None
+        if self._groups is None:
+            self._build()
+        by_tier, by_tier_car, open_servers = self._groups
+        tier = str(tier)
+        return by_tier.get(tier, set()) | by_tier_car.get((tier, car_model), set()) | open_servers
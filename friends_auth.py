@@ -0,0 +1,65 @@
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+AUTH_CACHE_SIZE = 10000
+
+class AuthCache(ABC):
+    """
+    Schnittstelle für den Token -> User-Cache. Eine geteilte Implementierung
+    (z.B. für mehrere Worker) muss nur diese Methoden bereitstellen.
+    """
+
+    @abstractmethod
+    def get(self, token):
+        """User-Name zum Token oder None, wenn nicht im Cache."""
+
+    @abstractmethod
+    def put(self, token, user):
+        """Merkt sich den User zum Token."""
+
+    @abstractmethod
+    def invalidate(self, token=None):
+        """Entfernt einen Token bzw. ohne Argument alle Einträge."""
+
+    @abstractmethod
+    def stats(self):
+        """Dict mit Größe und Hit/Miss-Zählern für /metrics."""
+
+class LocalAuthCache(AuthCache):
+    """Begrenzter LRU-Cache im Prozess mit Hit/Miss-Zählern."""
+
+    def __init__(self, maxsize=AUTH_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        with self._lock:
+            user = self._data.get(token)
+            if user is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(token)
+            self.hits += 1
+            return user
+
+    def put(self, token, user):
+        with self._lock:
+            self._data[token] = user
+            self._data.move_to_end(token)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, token=None):
+        with self._lock:
+            if token is None:
+                self._data.clear()
+            else:
+                self._data.pop(token, None)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
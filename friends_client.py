@@ -1,6 +1,11 @@
 import json
 import os
+import random
+import time
 import requests
+from transport import friends_transport
+
+EVENTS_MAX_BACKOFF = 60
 
 AUTH_FILE = "auth.json"
 
@@ -15,7 +20,7 @@ def save_auth(auth):
         json.dump(auth, f, indent=2)
 
 def register_user(name, server_url):
-    resp = requests.post(f"{server_url}/register", json={"name": name})
+    resp = friends_transport.post(f"{server_url}/register", json={"name": name})
     resp.raise_for_status()
     data = resp.json()
     auth = {"name": name, "token": data["token"]}
@@ -27,7 +32,7 @@ def post_status(auth, ip, server_url):
         "Authorization": f"Bearer {auth['token']}",
         "Content-Type": "application/json"
     }
-    resp = requests.post(f"{server_url}/status", json={"ip": ip}, headers=headers)
+    resp = friends_transport.post(f"{server_url}/status", json={"ip": ip}, headers=headers)
     resp.raise_for_status()
     return resp.json()
 
@@ -36,7 +41,7 @@ def add_friend(auth, friend_name, server_url):
         "Authorization": f"Bearer {auth['token']}",
         "Content-Type": "application/json"
     }
-    resp = requests.post(f"{server_url}/friends/request", json={"friend": friend_name}, headers=headers)
+    resp = friends_transport.post(f"{server_url}/friends/request", json={"friend": friend_name}, headers=headers)
     resp.raise_for_status()
     return resp.json()
 
@@ -45,7 +50,7 @@ def get_requests(auth, server_url):
         "Authorization": f"Bearer {auth['token']}",
         "Content-Type": "application/json"
     }
-    resp = requests.get(f"{server_url}/friends/requests", headers=headers)
+    resp = friends_transport.get(f"{server_url}/friends/requests", headers=headers)
     resp.raise_for_status()
     return resp.json()["incoming_requests"]
 
@@ -54,7 +59,7 @@ def accept_friend(auth, requester, server_url):
         "Authorization": f"Bearer {auth['token']}",
         "Content-Type": "application/json"
     }
-    resp = requests.post(f"{server_url}/friends/accept", json={"friend": requester}, headers=headers)
+    resp = friends_transport.post(f"{server_url}/friends/accept", json={"friend": requester}, headers=headers)
     resp.raise_for_status()
     return resp.json()
 
@@ -63,7 +68,7 @@ def reject_friend(auth, requester, server_url):
         "Authorization": f"Bearer {auth['token']}",
         "Content-Type": "application/json"
     }
-    resp = requests.post(f"{server_url}/friends/reject", json={"friend": requester}, headers=headers)
+    resp = friends_transport.post(f"{server_url}/friends/reject", json={"friend": requester}, headers=headers)
     resp.raise_for_status()
     return resp.json()
 
@@ -72,7 +77,7 @@ def get_online_friends(auth, server_url):
         "Authorization": f"Bearer {auth['token']}",
         "Content-Type": "application/json"
     }
-    resp = requests.get(f"{server_url}/friends/online", headers=headers)
+    resp = friends_transport.get(f"{server_url}/friends/online", headers=headers)
     resp.raise_for_status()
     return resp.json()["online_friends"]
 
@@ -81,7 +86,7 @@ def get_all_friends(auth, server_url):
         "Authorization": f"Bearer {auth['token']}",
         "Content-Type": "application/json"
     }
-    resp = requests.get(f"{server_url}/friends/list", headers=headers)
+    resp = friends_transport.get(f"{server_url}/friends/list", headers=headers)
     resp.raise_for_status()
     return resp.json()["friends"]
 
@@ -90,6 +95,87 @@ def remove_friend(auth, friend_name, server_url):
         "Authorization": f"Bearer {auth['token']}",
         "Content-Type": "application/json"
     }
-    resp = requests.post(f"{server_url}/friends/remove", json={"friend": friend_name}, headers=headers)
+    resp = friends_transport.post(f"{server_url}/friends/remove", json={"friend": friend_name}, headers=headers)
     resp.raise_for_status()
     return resp.json()
+
+def sync(auth, server_url, ip=None, previous=None):
+    """
+    Heartbeat (wenn ip gesetzt) plus Freunde und offene Anfragen in einem
+    Request. previous ist das Ergebnis des letzten Aufrufs; hat sich seitdem
+    nichts geändert, schickt der Server nur den Token und previous wird
+    zurückgegeben. Ergebnis: {"friends": [...], "incoming_requests": [...], "token": ...}
+    """
+    headers = {
+        "Authorization": f"Bearer {auth['token']}",
+        "Content-Type": "application/json"
+    }
+    params = {"since": previous["token"]} if previous else None
+    resp = friends_transport.post(f"{server_url}/sync", json={"ip": ip}, params=params, headers=headers)
+    resp.raise_for_status()
+    data = resp.json()
+    if data.get("unchanged"):
+        return previous
+    return data
+
+def _read_events(resp, on_event, stop, state):
+    """Parst einen SSE-Stream, state hält "last_id" und "retry" (ms) aktuell."""
+    event, data, event_id = "message", [], state["last_id"]
+    resp.encoding = "utf-8"
+    for line in resp.iter_lines(chunk_size=None, decode_unicode=True):
+        if stop is not None and stop.is_set():
+            break
+        if not line:
+            if data:
+                on_event(event, json.loads("\n".join(data)))
+                state["last_id"] = event_id
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue  # Keepalive
+        field, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if field == "id":
+            event_id = value
+        elif field == "event":
+            event = value
+        elif field == "data":
+            data.append(value)
+        elif field == "retry" and value.isdigit():
+            state["retry"] = int(value)
+
+def subscribe_events(auth, server_url, on_event, stop=None, last_event_id=None):
+    """
+    Blockiert und ruft on_event(event, data) für jedes Event vom Server auf
+    (presence, friend_request, friend_accepted, friend_removed, resync).
+    Bei Verbindungsabbruch wird mit Backoff neu verbunden und ab der letzten
+    Event-ID fortgesetzt. Läuft, bis stop (threading.Event) gesetzt ist;
+    daher in einem eigenen Thread starten. Gibt die letzte Event-ID zurück.
+    """
+    state = {"last_id": last_event_id, "retry": None}
+    delay = 1
+    while stop is None or not stop.is_set():
+        headers = {
+            "Authorization": f"Bearer {auth['token']}",
+            "Accept": "text/event-stream"
+        }
+        if state["last_id"] is not None:
+            headers["Last-Event-ID"] = str(state["last_id"])
+        try:
+            resp = friends_transport.get(f"{server_url}/friends/events", headers=headers, stream=True)
+            with resp:
+                resp.raise_for_status()
+                delay = (state["retry"] or 1000) / 1000
+                _read_events(resp, on_event, stop, state)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 401:
+                raise
+            print(f"Event-Stream Fehler: {e}")
+        except requests.RequestException as e:
+            print(f"Event-Stream getrennt: {e}")
+        if stop is not None and stop.is_set():
+            break
+        # Mit Jitter, damit nach einem Server-Neustart nicht alle gleichzeitig verbinden
+        time.sleep(random.uniform(delay / 2, delay))
+        delay = min(delay * 2, EVENTS_MAX_BACKOFF)
+    return state["last_id"]
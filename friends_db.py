@@ -0,0 +1,177 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+POOL_SIZE = 8
+READER_THREADS = 4
+
+# Pro Verbindung einmal gesetzt
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",      # Leser blockieren den Schreiber nicht mehr
+    "PRAGMA synchronous=NORMAL",    # im WAL-Modus sicher, spart fsync pro Commit
+    "PRAGMA busy_timeout=5000",     # auf den Schreib-Lock warten statt sofort "database is locked"
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",      # ca. 8 MB Page-Cache pro Verbindung
+]
+
+def _migration_1(c):
+    # Grundschema (entspricht dem bisherigen init_db)
+    c.execute('''CREATE TABLE IF NOT EXISTS users (
+        name TEXT PRIMARY KEY,
+        token TEXT,
+        last_seen TEXT,
+        last_ip TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS friends (
+        user TEXT,
+        friend TEXT,
+        PRIMARY KEY (user, friend)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS friend_requests (
+        from_user TEXT,
+        to_user TEXT,
+        status TEXT,
+        timestamp TEXT,
+        PRIMARY KEY (from_user, to_user)
+    )''')
+
+def _migration_2(c):
+    # last_seen als Unix-Zeit, damit der Online-Check direkt in SQL läuft
+    columns = [row[1] for row in c.execute("PRAGMA table_info(users)")]
+    if "last_seen_ts" not in columns:
+        c.execute("ALTER TABLE users ADD COLUMN last_seen_ts REAL")
+        c.execute("UPDATE users SET last_seen_ts = CAST(strftime('%s', last_seen) AS REAL) WHERE last_seen IS NOT NULL")
+
+def _migration_3(c):
+    # Jeder authentifizierte Request sucht nach dem Token, /friends/requests nach Empfänger + Status
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_token ON users (token)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_friend_requests_to_status ON friend_requests (to_user, status)")
+
+# Neue Migrationen nur hinten anhängen, die Position ist die Schema-Version
+MIGRATIONS = [_migration_1, _migration_2, _migration_3]
+
+class Database:
+    """
+    SQLite-Zugriff mit einem Pool wiederverwendeter Verbindungen (inkl. deren
+    Prepared-Statement-Cache), WAL-Modus und versionierten Migrationen
+    über PRAGMA user_version.
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, cached_statements=256)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._pool.get()
+
+    @contextmanager
+    def connection(self, immediate=False):
+        """
+        Leiht eine Verbindung aus dem Pool. Wie bei "with sqlite3.connect(...)"
+        wird am Ende committet bzw. bei einer Exception zurückgerollt.
+        immediate holt den Schreib-Lock gleich zu Beginn: bei mehreren
+        Prozessen scheitert sonst ein Lesen-dann-Schreiben mit "database is
+        locked", statt auf busy_timeout zu warten.
+        """
+        conn = self._acquire()
+        try:
+            if immediate:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._pool.put(conn)
+
+    def migrate(self):
+        # Startet jeder Worker gleichzeitig, migriert so nur der erste
+        with self.connection(immediate=True) as conn:
+            c = conn.cursor()
+            version = c.execute("PRAGMA user_version").fetchone()[0]
+            for number, migration in enumerate(MIGRATIONS, start=1):
+                if number > version:
+                    migration(c)
+                    c.execute(f"PRAGMA user_version = {number}")
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+class AsyncDatabase:
+    """
+    Nicht-blockierender Zugriff für async-Endpunkte. Lesende Funktionen laufen
+    in einem kleinen Thread-Pool, alle schreibenden nacheinander in genau einem
+    Writer-Thread (dessen Warteschlange). So wartet die Event-Loop nie auf
+    SQLite, und Schreiber konkurrieren nicht um den Lock.
+    fn bekommt einen Cursor und läuft in einer Transaktion.
+    """
+
+    def __init__(self, db, readers=READER_THREADS, observe=None):
+        self.db = db
+        # observe(kind, name, wartezeit, laufzeit) nach jedem Aufruf, z.B. für Metriken
+        self.observe = observe
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+
+    def _run(self, kind, fn, args):
+        with self.db.connection(immediate=kind == "write") as conn:
+            return fn(conn.cursor(), *args)
+
+    def _run_observed(self, kind, fn, args, submitted):
+        start = time.perf_counter()
+        try:
+            return self._run(kind, fn, args)
+        finally:
+            self.observe(kind, fn.__name__, start - submitted, time.perf_counter() - start)
+
+    def _submit(self, executor, kind, fn, args):
+        loop = asyncio.get_running_loop()
+        if self.observe is None:
+            return loop.run_in_executor(executor, self._run, kind, fn, args)
+        return loop.run_in_executor(executor, self._run_observed, kind, fn, args, time.perf_counter())
+
+    async def read(self, fn, *args):
+        return await self._submit(self._readers, "read", fn, args)
+
+    async def write(self, fn, *args):
+        return await self._submit(self._writer, "write", fn, args)
+
+    def close(self):
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        self.db.close()
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+
+EVENT_BUFFER = 2048     # so viele Events bleiben für ein Resume (Last-Event-ID) erhalten
+QUEUE_SIZE = 256        # pro Verbindung; wer nicht hinterherkommt, bekommt "resync"
+KEEPALIVE_SECONDS = 15  # Kommentarzeile, damit Proxys die Verbindung nicht schließen
+RETRY_MS = 3000
+POLL_INTERVAL = 0.2     # so oft holt ein Worker neue Events aus einem geteilten Log
+
+def format_event(event_id, event, data):
+    """Ein Event im Server-Sent-Events-Format."""
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+class LocalEventLog:
+    """Ringpuffer im Prozess, für einen einzelnen Worker."""
+
+    shared = False
+
+    def __init__(self, size=EVENT_BUFFER):
+        # Start bei der aktuellen Zeit in ms: IDs bleiben über einen Neustart hinweg monoton
+        self._next_id = int(time.time() * 1000)
+        self._buffer = deque(maxlen=size)  # (id, user, event, data)
+
+    def append(self, items):
+        """items: [(user, event, data)]. Gibt [(id, user, event, data)] zurück."""
+        result = []
+        for user, event, data in items:
+            result.append((self._next_id, user, event, data))
+            self._next_id += 1
+        self._buffer.extend(result)
+        return result
+
+    def since(self, user, last_id):
+        """Events für user nach last_id oder None, wenn die Lücke nicht mehr im Puffer liegt."""
+        oldest = self._buffer[0][0] if self._buffer else self._next_id
+        if last_id + 1 < oldest or last_id >= self._next_id:
+            return None
+        return [(i, e, d) for i, u, e, d in self._buffer if u == user and i > last_id]
+
+    def last_id(self):
+        return self._next_id - 1
+
+class SqliteEventLog:
+    """
+    Event-Log in einer SQLite-Datei, das sich mehrere Worker teilen: jeder
+    schreibt seine Events hinein und holt per after() die aller anderen ab,
+    egal an welchem Worker der Empfänger verbunden ist. Alte Einträge werden
+    beim Schreiben regelmäßig auf size begrenzt. Blockiert, daher aus der
+    Event-Loop nur über einen Thread aufrufen.
+    """
+
+    shared = True
+
+    def __init__(self, path, size=EVENT_BUFFER * 8):
+        self.path = path
+        self.size = size
+        self._local = threading.local()
+        self._appended = 0
+        conn = self._connection()
+        # AUTOINCREMENT: IDs werden auch nach dem Aufräumen nie wiederverwendet
+        conn.execute("""CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user TEXT NOT NULL,
+            event TEXT NOT NULL,
+            data TEXT NOT NULL
+        )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_user ON events (user, id)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def append(self, items):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = []
+            for user, event, data in items:
+                row = conn.execute("INSERT INTO events (user, event, data) VALUES (?, ?, ?) RETURNING id",
+                                   (user, event, data)).fetchone()
+                result.append((row[0], user, event, data))
+            self._appended += len(result)
+            if self._appended >= 256:
+                self._appended = 0
+                conn.execute("DELETE FROM events WHERE id <= ?", (result[-1][0] - self.size,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    def since(self, user, last_id):
+        conn = self._connection()
+        oldest, newest = conn.execute("SELECT MIN(id), MAX(id) FROM events").fetchone()
+        newest = newest if newest is not None else self.last_id()
+        oldest = oldest if oldest is not None else newest + 1
+        if last_id + 1 < oldest or last_id > newest:
+            return None
+        return conn.execute("SELECT id, event, data FROM events WHERE user = ? AND id > ? ORDER BY id",
+                            (user, last_id)).fetchall()
+
+    def after(self, last_id, limit=1000):
+        """Alle Events nach last_id, für die Zustellung an die eigenen Verbindungen."""
+        return self._connection().execute(
+            "SELECT id, user, event, data FROM events WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)).fetchall()
+
+    def last_id(self):
+        row = self._connection().execute("SELECT seq FROM sqlite_sequence WHERE name = 'events'").fetchone()
+        return row[0] if row else 0
+
+class EventBroker:
+    """
+    Verteilt Events (Presence, Freundschaftsanfragen) an die offenen
+    SSE-Verbindungen der Empfänger. Jedes Event bekommt im Log eine
+    fortlaufende ID; nach einem Verbindungsabbruch wird ab der
+    Last-Event-ID nachgeliefert. Mit einem geteilten Log (mehrere Worker)
+    stellt poll() die Events aller Worker zu. Läuft in der Event-Loop,
+    daher ohne Locks.
+    """
+
+    def __init__(self, log=None, queue_size=QUEUE_SIZE):
+        self.log = log if log is not None else LocalEventLog()
+        self._subscribers = {}  # user -> set(asyncio.Queue)
+        self.queue_size = queue_size
+
+    async def _call_log(self, fn, *args):
+        if self.log.shared:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def has_subscribers(self, users=None):
+        if self.log.shared:
+            return True  # Empfänger können an einem anderen Worker hängen
+        if users is None:
+            return bool(self._subscribers)
+        return any(u in self._subscribers for u in users)
+
+    def subscriber_count(self):
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    async def publish(self, users, event, payload):
+        """Schickt payload (JSON-fähig) als event an alle users."""
+        data = json.dumps(payload, separators=(",", ":"))
+        items = [(user, event, data) for user in users]
+        if not items:
+            return
+        appended = await self._call_log(self.log.append, items)
+        if not self.log.shared:
+            # Beim geteilten Log stellt poll() zu, auch die eigenen Events
+            self._dispatch(appended)
+
+    def _dispatch(self, items):
+        for event_id, user, event, data in items:
+            for queue in self._subscribers.get(user, ()):
+                try:
+                    queue.put_nowait((event_id, event, data))
+                except asyncio.QueueFull:
+                    # Zu langsamer Client: Queue leeren, er holt sich den Stand neu
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(None)
+
+    async def poll(self, interval=POLL_INTERVAL):
+        """Nur für geteilte Logs: neue Events aller Worker an die eigenen Verbindungen."""
+        last = await asyncio.to_thread(self.log.last_id)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                items = await asyncio.to_thread(self.log.after, last)
+            except sqlite3.Error as e:
+                print(f"Fehler beim Lesen des Event-Logs: {e}")
+                continue
+            if items:
+                last = items[-1][0]
+                self._dispatch(items)
+
+    async def subscribe(self, user, last_event_id=None):
+        """
+        Meldet eine Verbindung an. Gibt (queue, backlog) zurück; backlog sind
+        die verpassten Events seit last_event_id oder None, wenn diese nicht
+        mehr im Log liegen und der Client neu laden muss.
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user, set()).add(queue)
+        backlog = []
+        if last_event_id is not None:
+            backlog = await self._call_log(self.log.since, user, last_event_id)
+        return queue, backlog
+
+    def unsubscribe(self, user, queue):
+        queues = self._subscribers.get(user)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user]
+
+    async def stream(self, user, last_event_id=None, keepalive=KEEPALIVE_SECONDS):
+        """Async-Generator mit dem SSE-Text für eine Verbindung."""
+        queue, backlog = await self.subscribe(user, last_event_id)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            sent = last_event_id or 0
+            if backlog is None:
+                sent = await self._call_log(self.log.last_id)
+                yield format_event(sent, "resync", "{}")
+            else:
+                for item in backlog:
+                    sent = item[0]
+                    yield format_event(*item)
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    yield format_event(await self._call_log(self.log.last_id), "resync", "{}")
+                    return
+                if item[0] <= sent:
+                    continue  # schon mit dem Backlog verschickt
+                sent = item[0]
+                yield format_event(*item)
+        finally:
+            self.unsubscribe(user, queue)
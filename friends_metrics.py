@@ -0,0 +1,159 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Sekunden; deckt Cache-Treffer (< 1 ms) bis zu überlasteten Requests ab
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, count in items:
+            yield f"{self.name}{_format_labels(self.labels, values)} {_format_value(count)}"
+
+class Histogram:
+    """Pro Beobachtung nur ein bisect und zwei Additionen; kumuliert wird erst beim Abruf."""
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}  # label_values -> [bucket_counts..., +Inf], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+        for values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                labels = _format_labels(self.labels + ("le",), values + (str(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, values)
+            yield f"{self.name}_sum{labels} {total!r}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+class Gauge:
+    """
+    Wert wird erst beim Abruf über fn() ermittelt, kostet also im Betrieb
+    nichts. Mit kind="counter" für Zähler, die woanders ohnehin geführt werden.
+    """
+
+    def __init__(self, name, description, fn, kind="gauge"):
+        self.name = name
+        self.description = description
+        self.fn = fn
+        self.kind = kind
+
+    def render(self):
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield f"{self.name} {_format_value(self.fn())}"
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        # Gleicher Name ersetzt: Worker-Prozesse importieren friends_server u.U. zweimal
+        # (als __mp_main__ und als App-Modul)
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "friends_http_requests_total", "HTTP-Requests pro Route und Status", ("method", "route", "status")))
+http_latency = registry.register(Histogram(
+    "friends_http_request_duration_seconds", "Zeit bis zum Antwortbeginn pro Route", ("method", "route")))
+db_queries = registry.register(Counter(
+    "friends_db_queries_total", "Datenbank-Aufrufe pro Funktion", ("kind", "query")))
+db_duration = registry.register(Histogram(
+    "friends_db_query_duration_seconds", "Laufzeit der Datenbank-Aufrufe", ("kind", "query")))
+db_wait = registry.register(Histogram(
+    "friends_db_queue_wait_seconds", "Wartezeit auf einen freien Reader- bzw. den Writer-Thread", ("kind",)))
+
+def observe_db(kind, query, waited, duration):
+    """Callback für friends_db.AsyncDatabase(observe=...)."""
+    db_queries.inc(kind, query)
+    db_duration.observe(duration, kind, query)
+    db_wait.observe(waited, kind)
+
+class MetricsMiddleware:
+    """
+    Reine ASGI-Middleware (ohne BaseHTTPMiddleware und deren Extra-Task pro
+    Request). Gemessen wird bis zum Start der Antwort, damit offene
+    Event-Streams nicht als endlos langsame Requests zählen.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        started = False
+
+        async def send_wrapper(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                self._record(scope, message["status"], time.perf_counter() - start)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not started:
+                self._record(scope, 500, time.perf_counter() - start)
+            raise
+
+    def _record(self, scope, status, duration):
+        # Routen-Template statt Pfad, unbekannte Pfade zusammengefasst (begrenzte Label-Anzahl)
+        route = scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        http_requests.inc(scope["method"], path, str(status))
+        http_latency.observe(duration, scope["method"], path)
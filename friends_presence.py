@@ -0,0 +1,240 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+ONLINE_SECONDS = 60
+FLUSH_INTERVAL = 30  # Sekunden zwischen zwei Schreibvorgängen in die Datenbank
+EXPIRE_INTERVAL = 5  # so schnell wird "offline" erkannt und gemeldet
+
+class PresenceStore:
+    """
+    Online-Status (last_seen, last_ip) im Speicher eines Prozesses. Heartbeats ändern nur
+    diesen Speicher; geänderte Einträge werden periodisch gesammelt in die
+    Datenbank geschrieben (write-behind) und dienen nur der Wiederherstellung
+    nach einem Neustart. Einträge älter als ttl gelten als offline und werden
+    beim Aufräumen entfernt.
+    """
+
+    shared = False
+
+    def __init__(self, ttl=ONLINE_SECONDS, clock=time.time):
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = {}  # name -> (last_seen_ts, ip)
+        self._dirty = {}
+        self._lock = threading.Lock()
+
+    def heartbeat(self, name, ip):
+        """Gibt True zurück, wenn name dadurch online kam oder die IP wechselte."""
+        now = self._clock()
+        entry = (now, ip)
+        with self._lock:
+            previous = self._entries.get(name)
+            self._entries[name] = entry
+            self._dirty[name] = entry
+        return previous is None or previous[0] <= now - self.ttl or previous[1] != ip
+
+    def get(self, name):
+        """(last_seen_ts, ip) wenn online, sonst None."""
+        entry = self._entries.get(name)
+        if entry is None or entry[0] <= self._clock() - self.ttl:
+            return None
+        return entry
+
+    def get_many(self, names):
+        """name -> (last_seen_ts, ip) für alle Online-User aus names."""
+        threshold = self._clock() - self.ttl
+        entries = self._entries
+        result = {}
+        for name in names:
+            entry = entries.get(name)
+            if entry is not None and entry[0] > threshold:
+                result[name] = entry
+        return result
+
+    def is_online(self, name):
+        return self.get(name) is not None
+
+    def online_count(self):
+        threshold = self._clock() - self.ttl
+        with self._lock:
+            return sum(1 for ts, _ in self._entries.values() if ts > threshold)
+
+    def load(self, rows):
+        """Startzustand aus der Datenbank: Zeilen (name, last_seen_ts, ip)."""
+        threshold = self._clock() - self.ttl
+        with self._lock:
+            for name, ts, ip in rows:
+                current = self._entries.get(name)
+                if ts and ts > threshold and (current is None or current[0] < ts):
+                    self._entries[name] = (ts, ip)
+
+    def expire(self):
+        """Entfernt abgelaufene Einträge. Gibt die Namen zurück."""
+        threshold = self._clock() - self.ttl
+        with self._lock:
+            expired = [name for name, (ts, _) in self._entries.items() if ts <= threshold]
+            for name in expired:
+                del self._entries[name]
+        return expired
+
+    def take_dirty(self):
+        """Geänderte Einträge seit dem letzten Aufruf als (ts, ip, name) für executemany."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        return [(ts, ip, name) for name, (ts, ip) in dirty.items()]
+
+    def requeue(self, rows):
+        """Nach einem fehlgeschlagenen Flush erneut vormerken, sofern nichts Neueres kam."""
+        with self._lock:
+            for ts, ip, name in rows:
+                self._dirty.setdefault(name, (ts, ip))
+
+class SqlitePresenceStore:
+    """
+    Gleiche Schnittstelle wie PresenceStore, aber in einer eigenen
+    SQLite-Datei, die sich mehrere Worker-Prozesse teilen (WAL,
+    synchronous=OFF: die Daten sind flüchtig und landen ohnehin per
+    write-behind in der Hauptdatenbank). expire() und take_dirty() sind
+    atomar, damit jeder Eintrag nur von einem Worker gemeldet bzw.
+    geschrieben wird. Jede Methode ist eine kurze Transaktion und
+    blockiert, daher aus der Event-Loop nur über AsyncPresence aufrufen.
+    """
+
+    shared = True
+
+    def __init__(self, path, ttl=ONLINE_SECONDS, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self._clock = clock
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS presence (
+                name TEXT PRIMARY KEY,
+                ts REAL NOT NULL,
+                ip TEXT,
+                online INTEGER NOT NULL DEFAULT 1,
+                dirty INTEGER NOT NULL DEFAULT 0
+            )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_presence_dirty ON presence (dirty) WHERE dirty = 1")
+
+    def _connection(self):
+        # Eine Verbindung pro Thread, isolation_level=None: Transaktionen nur explizit
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE: Schreib-Lock gleich zu Beginn, kein Abbruch beim Hochstufen vom Lesen
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def heartbeat(self, name, ip):
+        """Gibt True zurück, wenn name dadurch online kam oder die IP wechselte."""
+        now = self._clock()
+        with self._transaction() as conn:
+            previous = conn.execute("SELECT ts, ip FROM presence WHERE name = ?", (name,)).fetchone()
+            conn.execute("INSERT OR REPLACE INTO presence (name, ts, ip, online, dirty) VALUES (?, ?, ?, 1, 1)",
+                         (name, now, ip))
+        return previous is None or previous[0] <= now - self.ttl or previous[1] != ip
+
+    def get(self, name):
+        return self.get_many((name,)).get(name)
+
+    def get_many(self, names):
+        names = list(names)
+        if not names:
+            return {}
+        threshold = self._clock() - self.ttl
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT p.name, p.ts, p.ip FROM presence p JOIN json_each(?) j ON p.name = j.value WHERE p.ts > ?",
+            (json.dumps(names), threshold))
+        return {name: (ts, ip) for name, ts, ip in rows}
+
+    def is_online(self, name):
+        return self.get(name) is not None
+
+    def online_count(self):
+        conn = self._connection()
+        return conn.execute("SELECT COUNT(*) FROM presence WHERE ts > ?", (self._clock() - self.ttl,)).fetchone()[0]
+
+    def load(self, rows):
+        # Mehrere Worker laden beim Start dasselbe, neuere Heartbeats bleiben unangetastet
+        threshold = self._clock() - self.ttl
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO presence (name, ts, ip) VALUES (?, ?, ?)",
+                             [(name, ts, ip) for name, ts, ip in rows if ts and ts > threshold])
+
+    def expire(self):
+        # Noch nicht geschriebene Zeilen bleiben (für take_dirty), nur der Online-Status wird zurückgesetzt.
+        # Offline und geschrieben: wird nicht mehr gebraucht, sonst wächst die Tabelle mit jedem User.
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM presence WHERE online = 0 AND dirty = 0")
+            rows = conn.execute("UPDATE presence SET online = 0 WHERE online = 1 AND ts <= ? RETURNING name",
+                                (self._clock() - self.ttl,)).fetchall()
+        return [row[0] for row in rows]
+
+    def take_dirty(self):
+        with self._transaction() as conn:
+            rows = conn.execute("UPDATE presence SET dirty = 0 WHERE dirty = 1 RETURNING ts, ip, name").fetchall()
+        return rows
+
+    def requeue(self, rows):
+        with self._transaction() as conn:
+            conn.executemany("UPDATE presence SET dirty = 1 WHERE name = ?", [(name,) for _, _, name in rows])
+
+class AsyncPresence:
+    """
+    Async-Fassade für die Endpunkte: ein geteilter (SQLite-)Store läuft in
+    einem Thread, damit die Event-Loop nie auf dessen Locks wartet (bis zu
+    busy_timeout bei vielen Workern). Der Store im Speicher wird direkt
+    aufgerufen, er blockiert nicht.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    async def _call(self, fn, *args):
+        if self.store.shared:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def heartbeat(self, name, ip):
+        return await self._call(self.store.heartbeat, name, ip)
+
+    async def get(self, name):
+        return await self._call(self.store.get, name)
+
+    async def get_many(self, names):
+        return await self._call(self.store.get_many, names)
+
+    async def online_count(self):
+        return await self._call(self.store.online_count)
+
+    async def load(self, rows):
+        return await self._call(self.store.load, rows)
+
+    async def expire(self):
+        return await self._call(self.store.expire)
+
+    async def take_dirty(self):
+        return await self._call(self.store.take_dirty)
+
+    async def requeue(self, rows):
+        return await self._call(self.store.requeue, rows)
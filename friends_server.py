@@ -1,36 +1,109 @@
 from fastapi import FastAPI, HTTPException, Header, Depends
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
 from uuid import uuid4
-from datetime import datetime, timedelta
-import sqlite3
+from contextlib import asynccontextmanager
+from datetime import datetime
+import asyncio
+import hashlib
+import json
+import time
 import os
 
-app = FastAPI()
-DB_FILE = "friends.db"
-
-def init_db():
-    with sqlite3.connect(DB_FILE) as conn:
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS users (
-            name TEXT PRIMARY KEY,
-            token TEXT,
-            last_seen TEXT,
-            last_ip TEXT
-        )''')
-        c.execute('''CREATE TABLE IF NOT EXISTS friends (
-            user TEXT,
-            friend TEXT,
-            PRIMARY KEY (user, friend)
-        )''')
-        c.execute('''CREATE TABLE IF NOT EXISTS friend_requests (
-            from_user TEXT,
-            to_user TEXT,
-            status TEXT,
-            timestamp TEXT,
-            PRIMARY KEY (from_user, to_user)
-        )''')
-
-init_db()
+from friends_db import Database, AsyncDatabase
+from friends_auth import LocalAuthCache
+from friends_presence import PresenceStore, SqlitePresenceStore, AsyncPresence, ONLINE_SECONDS, FLUSH_INTERVAL, EXPIRE_INTERVAL
+from friends_events import EventBroker, SqliteEventLog
+import friends_metrics
+from friends_metrics import Gauge, MetricsMiddleware
+
+DB_FILE = os.environ.get("FRIENDS_DB", "friends.db")
+# "local": Presence und Events im Prozess (ein Worker)
+# "sqlite": geteilt über eigene SQLite-Dateien neben DB_FILE (mehrere Worker)
+BACKEND = os.environ.get("FRIENDS_BACKEND", "local")
+
+def make_backends():
+    if BACKEND == "sqlite":
+        base = os.path.splitext(DB_FILE)[0]
+        return AsyncPresence(SqlitePresenceStore(f"{base}_presence.db")), EventBroker(SqliteEventLog(f"{base}_events.db"))
+    if BACKEND != "local":
+        raise ValueError(f"Unbekanntes FRIENDS_BACKEND: {BACKEND}")
+    return AsyncPresence(PresenceStore()), EventBroker()
+
+db = Database(DB_FILE)
+db.migrate()
+# Endpunkte sind async: SQLite läuft in Reader-Threads bzw. dem einen Writer-Thread
+adb = AsyncDatabase(db, observe=friends_metrics.observe_db)
+# Tokens ändern sich nach /register nie, ein Cache pro Worker kann also nicht veralten
+auth_cache = LocalAuthCache()
+presence, events = make_backends()
+
+def _load_presence(c, threshold):
+    c.execute("SELECT name, last_seen_ts, last_ip FROM users WHERE last_seen_ts > ?", (threshold,))
+    return c.fetchall()
+
+def _flush_presence(c, rows):
+    c.executemany("UPDATE users SET last_seen_ts = ?, last_ip = ? WHERE name = ?", rows)
+
+async def flush_presence():
+    rows = await presence.take_dirty()
+    if not rows:
+        return
+    try:
+        await adb.write(_flush_presence, rows)
+    except Exception as e:
+        print(f"Fehler beim Speichern der Presence: {e}")
+        await presence.requeue(rows)
+
+async def presence_loop():
+    # Abgelaufene Heartbeats häufig prüfen (Offline-Events), in die Datenbank seltener schreiben
+    last_flush = time.monotonic()
+    while True:
+        await asyncio.sleep(EXPIRE_INTERVAL)
+        for name in await presence.expire():
+            await publish_presence(name, None)
+        if time.monotonic() - last_flush >= FLUSH_INTERVAL:
+            last_flush = time.monotonic()
+            await flush_presence()
+
+@asynccontextmanager
+async def lifespan(app):
+    # Presence lebt im Speicher; beim Start den letzten Stand laden, beim Beenden alles schreiben
+    await presence.load(await adb.read(_load_presence, time.time() - ONLINE_SECONDS))
+    tasks = [asyncio.create_task(presence_loop())]
+    if events.log.shared:
+        tasks.append(asyncio.create_task(events.poll()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await flush_presence()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
+def _auth_hit_ratio():
+    stats = auth_cache.stats()
+    total = stats["hits"] + stats["misses"]
+    return stats["hits"] / total if total else 0.0
+
+# Wird vor jedem /metrics-Abruf über die Presence-Fassade aktualisiert, render() selbst blockiert nie
+presence_stats = {"online": 0}
+
+friends_metrics.registry.register(Gauge(
+    "friends_online_users", "User mit Heartbeat innerhalb von ONLINE_SECONDS", lambda: presence_stats["online"]))
+friends_metrics.registry.register(Gauge(
+    "friends_event_subscribers", "Offene Event-Streams", events.subscriber_count))
+friends_metrics.registry.register(Gauge(
+    "friends_auth_cache_hits_total", "Token-Lookups aus dem Cache", lambda: auth_cache.stats()["hits"], kind="counter"))
+friends_metrics.registry.register(Gauge(
+    "friends_auth_cache_misses_total", "Token-Lookups aus der Datenbank", lambda: auth_cache.stats()["misses"], kind="counter"))
+friends_metrics.registry.register(Gauge(
+    "friends_auth_cache_hit_ratio", "Anteil der Token-Lookups aus dem Cache", _auth_hit_ratio))
+friends_metrics.registry.register(Gauge(
+    "friends_auth_cache_size", "Einträge im Token-Cache", lambda: auth_cache.stats()["size"]))
 
 class RegisterRequest(BaseModel):
     name: str
@@ -44,46 +117,73 @@ class FriendRequest(BaseModel):
 class RemoveFriendRequest(BaseModel):
     friend: str
 
-def get_user_by_token(authorization: str = Header(...)):
+class SyncRequest(BaseModel):
+    ip: Optional[str] = None  # Heartbeat mitsenden, None = nur abfragen
+
+def _user_by_token(c, token):
+    c.execute("SELECT name FROM users WHERE token = ?", (token,))
+    row = c.fetchone()
+    return row[0] if row else None
+
+async def get_user_by_token(authorization: str = Header(...)):
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Invalid token header")
     token = authorization.split(" ", 1)[1]
-    with sqlite3.connect(DB_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT name FROM users WHERE token = ?", (token,))
-        row = c.fetchone()
-        if not row:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return row[0]
+    # Tokens ändern sich nach /register nicht mehr, daher reicht meist der Cache
+    user = auth_cache.get(token)
+    if user is not None:
+        return user
+    user = await adb.read(_user_by_token, token)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    auth_cache.put(token, user)
+    return user
+
+def _register(c, name):
+    c.execute("SELECT name FROM users WHERE name = ?", (name,))
+    if c.fetchone():
+        raise HTTPException(status_code=400, detail="User already exists")
+    token = str(uuid4())
+    c.execute("INSERT INTO users (name, token) VALUES (?, ?)", (name, token))
+    return token
 
 @app.post("/register")
-def register(req: RegisterRequest):
-    with sqlite3.connect(DB_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT name FROM users WHERE name = ?", (req.name,))
-        if c.fetchone():
-            raise HTTPException(status_code=400, detail="User already exists")
-        token = str(uuid4())
-        c.execute("INSERT INTO users (name, token) VALUES (?, ?)", (req.name, token))
+async def register(req: RegisterRequest):
+    token = await adb.write(_register, req.name)
+    auth_cache.put(token, req.name)
     return {"token": token}
 
+def _friend_names(c, user):
+    c.execute("SELECT friend FROM friends WHERE user = ?", (user,))
+    return [row[0] for row in c.fetchall()]
+
+async def publish_presence(name, ip):
+    """Meldet online (mit IP) bzw. offline (ip None) an alle verbundenen Freunde."""
+    if not events.has_subscribers():
+        return
+    # Freundschaften sind symmetrisch gespeichert, die Freunde von name sind also seine Beobachter
+    watchers = [w for w in await adb.read(_friend_names, name) if events.has_subscribers((w,))]
+    if watchers:
+        await events.publish(watchers, "presence", {"name": name, "online": ip is not None, "ip": ip})
+
 @app.post("/status")
-def update_status(data: StatusUpdate, user: str = Depends(get_user_by_token)):
-    now = datetime.utcnow().isoformat()
-    with sqlite3.connect(DB_FILE) as conn:
-        c = conn.cursor()
-        c.execute("UPDATE users SET last_seen = ?, last_ip = ? WHERE name = ?", (now, data.ip, user))
+async def update_status(data: StatusUpdate, user: str = Depends(get_user_by_token)):
+    # Nur im Speicher, die Datenbank wird gesammelt im Hintergrund aktualisiert
+    if await presence.heartbeat(user, data.ip):
+        await publish_presence(user, data.ip)
     return {"status": "ok"}
 
+def _request_friend(c, user, friend):
+    c.execute("SELECT name FROM users WHERE name = ?", (friend,))
+    if not c.fetchone():
+        raise HTTPException(status_code=404, detail="Friend not found")
+    c.execute("INSERT OR REPLACE INTO friend_requests (from_user, to_user, status, timestamp) VALUES (?, ?, ?, ?)",
+              (user, friend, "pending", datetime.utcnow().isoformat()))
+
 @app.post("/friends/request")
-def request_friend(data: FriendRequest, user: str = Depends(get_user_by_token)):
-    with sqlite3.connect(DB_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT name FROM users WHERE name = ?", (data.friend,))
-        if not c.fetchone():
-            raise HTTPException(status_code=404, detail="Friend not found")
-        c.execute("INSERT OR REPLACE INTO friend_requests (from_user, to_user, status, timestamp) VALUES (?, ?, ?, ?)",
-                  (user, data.friend, "pending", datetime.utcnow().isoformat()))
+async def request_friend(data: FriendRequest, user: str = Depends(get_user_by_token)):
+    await adb.write(_request_friend, user, data.friend)
+    await events.publish((data.friend,), "friend_request", {"from": user})
     return {"status": "friend request sent"}
 
 # Die Freundschaftsanfrage wird trotzdem in der Tabelle friend_requests gespeichert,
@@ -96,85 +196,143 @@ def request_friend(data: FriendRequest, user: str = Depends(get_user_by_token)):
 
 # Es ist keine Änderung am Servercode nötig, das ist bereits so implementiert.
 
+def _friend_requests(c, user):
+    c.execute("SELECT from_user FROM friend_requests WHERE to_user = ? AND status = 'pending'", (user,))
+    return [row[0] for row in c.fetchall()]
+
 @app.get("/friends/requests")
-def get_friend_requests(user: str = Depends(get_user_by_token)):
-    with sqlite3.connect(DB_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT from_user FROM friend_requests WHERE to_user = ? AND status = 'pending'", (user,))
-        requests = [row[0] for row in c.fetchall()]
+async def get_friend_requests(user: str = Depends(get_user_by_token)):
+    requests = await adb.read(_friend_requests, user)
     return {"incoming_requests": requests}
 
+def _accept_friend(c, user, friend):
+    c.execute("UPDATE friend_requests SET status = 'accepted' WHERE from_user = ? AND to_user = ?", (friend, user))
+    c.execute("INSERT OR IGNORE INTO friends (user, friend) VALUES (?, ?)", (user, friend))
+    c.execute("INSERT OR IGNORE INTO friends (user, friend) VALUES (?, ?)", (friend, user))
+
 @app.post("/friends/accept")
-def accept_friend(data: FriendRequest, user: str = Depends(get_user_by_token)):
-    with sqlite3.connect(DB_FILE) as conn:
-        c = conn.cursor()
-        c.execute("UPDATE friend_requests SET status = 'accepted' WHERE from_user = ? AND to_user = ?", (data.friend, user))
-        c.execute("INSERT OR IGNORE INTO friends (user, friend) VALUES (?, ?)", (user, data.friend))
-        c.execute("INSERT OR IGNORE INTO friends (user, friend) VALUES (?, ?)", (data.friend, user))
+async def accept_friend(data: FriendRequest, user: str = Depends(get_user_by_token)):
+    await adb.write(_accept_friend, user, data.friend)
+    entry = await presence.get(user)
+    await events.publish((data.friend,), "friend_accepted",
+                         {"name": user, "online": entry is not None, "ip": entry[1] if entry else None})
     return {"status": "friend request accepted"}
 
+def _reject_friend(c, user, friend):
+    c.execute("UPDATE friend_requests SET status = 'rejected' WHERE from_user = ? AND to_user = ?", (friend, user))
+
 @app.post("/friends/reject")
-def reject_friend(data: FriendRequest, user: str = Depends(get_user_by_token)):
-    with sqlite3.connect(DB_FILE) as conn:
-        c = conn.cursor()
-        c.execute("UPDATE friend_requests SET status = 'rejected' WHERE from_user = ? AND to_user = ?", (data.friend, user))
+async def reject_friend(data: FriendRequest, user: str = Depends(get_user_by_token)):
+    await adb.write(_reject_friend, user, data.friend)
     return {"status": "friend request rejected"}
 
+def _remove_friend(c, user, friend):
+    # Entferne Freundschaft in beide Richtungen
+    c.execute("DELETE FROM friends WHERE (user = ? AND friend = ?) OR (user = ? AND friend = ?)", (user, friend, friend, user))
+    # Optional: Entferne offene Anfragen zwischen den beiden
+    c.execute("DELETE FROM friend_requests WHERE (from_user = ? AND to_user = ?) OR (from_user = ? AND to_user = ?)", (user, friend, friend, user))
+
 @app.post("/friends/remove")
-def remove_friend(data: RemoveFriendRequest, user: str = Depends(get_user_by_token)):
-    with sqlite3.connect(DB_FILE) as conn:
-        c = conn.cursor()
-        # Entferne Freundschaft in beide Richtungen
-        c.execute("DELETE FROM friends WHERE (user = ? AND friend = ?) OR (user = ? AND friend = ?)", (user, data.friend, data.friend, user))
-        # Optional: Entferne offene Anfragen zwischen den beiden
-        c.execute("DELETE FROM friend_requests WHERE (from_user = ? AND to_user = ?) OR (from_user = ? AND to_user = ?)", (user, data.friend, data.friend, user))
+async def remove_friend(data: RemoveFriendRequest, user: str = Depends(get_user_by_token)):
+    await adb.write(_remove_friend, user, data.friend)
+    await events.publish((data.friend,), "friend_removed", {"name": user})
     return {"status": "friend removed"}
 
+def iso_time(ts):
+    return datetime.utcfromtimestamp(ts).isoformat() if ts else None
+
 @app.get("/friends/list")
-def list_friends(user: str = Depends(get_user_by_token)):
-    with sqlite3.connect(DB_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT friend FROM friends WHERE user = ?", (user,))
-        friends = [row[0] for row in c.fetchall()]
-        result = []
-        threshold = datetime.utcnow() - timedelta(seconds=60)
-        for friend in friends:
-            c.execute("SELECT last_seen, last_ip FROM users WHERE name = ?", (friend,))
-            row = c.fetchone()
-            online = False
-            ip = None
-            if row:
-                last_seen = datetime.fromisoformat(row[0]) if row[0] else None
-                if last_seen and last_seen > threshold:
-                    online = True
-                    ip = row[1]
-            result.append({
-                "name": friend,
-                "online": online,
-                "ip": ip
-            })
+async def list_friends(user: str = Depends(get_user_by_token)):
+    # Freunde aus der Datenbank, Online-Status aus dem Speicher
+    friends = await adb.read(_friend_names, user)
+    online = await presence.get_many(friends)
+    result = []
+    for friend in friends:
+        entry = online.get(friend)
+        result.append({
+            "name": friend,
+            "online": entry is not None,
+            "ip": entry[1] if entry else None
+        })
     return {"friends": result}
 
 @app.get("/friends/online")
-def online_friends(user: str = Depends(get_user_by_token)):
-    with sqlite3.connect(DB_FILE) as conn:
-        c = conn.cursor()
-        c.execute("SELECT friend FROM friends WHERE user = ?", (user,))
-        friends = [row[0] for row in c.fetchall()]
-
-        result = []
-        threshold = datetime.utcnow() - timedelta(seconds=60)
-        for friend in friends:
-            c.execute("SELECT last_seen, last_ip FROM users WHERE name = ?", (friend,))
-            row = c.fetchone()
-            if row:
-                last_seen = datetime.fromisoformat(row[0]) if row[0] else None
-                if last_seen and last_seen > threshold:
-                    result.append({"name": friend, "ip": row[1], "last_seen": row[0]})
-
+async def online_friends(user: str = Depends(get_user_by_token)):
+    friends = await adb.read(_friend_names, user)
+    online = await presence.get_many(friends)
+    result = []
+    for friend in friends:
+        entry = online.get(friend)
+        if entry:
+            result.append({"name": friend, "ip": entry[1], "last_seen": iso_time(entry[0])})
     return {"online_friends": result}
 
+def _sync_state(c, user):
+    # Freunde und offene Anfragen mit derselben Verbindung
+    return _friend_names(c, user), _friend_requests(c, user)
+
+def state_token(state):
+    raw = json.dumps(state, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(raw, digest_size=12).hexdigest()
+
+@app.post("/sync")
+async def sync(data: SyncRequest, since: Optional[str] = None, user: str = Depends(get_user_by_token)):
+    """
+    Heartbeat, Freundesliste mit Online-Status und offene Anfragen in einem
+    Request. Stimmt since mit dem Token des aktuellen Stands überein, kommt
+    nur {"unchanged": true, "token": ...} zurück.
+    """
+    if data.ip is not None and await presence.heartbeat(user, data.ip):
+        await publish_presence(user, data.ip)
+    friends, requests = await adb.read(_sync_state, user)
+    online = await presence.get_many(friends)
+    result = []
+    for friend in friends:
+        entry = online.get(friend)
+        result.append({"name": friend, "online": entry is not None, "ip": entry[1] if entry else None})
+    state = {"friends": result, "incoming_requests": requests}
+    token = state_token(state)
+    if since == token:
+        return {"unchanged": True, "token": token}
+    state["token"] = token
+    return state
+
+@app.get("/friends/events")
+async def friend_events(user: str = Depends(get_user_by_token), last_event_id: str = Header(None)):
+    """
+    Server-Sent Events: presence, friend_request, friend_accepted, friend_removed.
+    Mit Last-Event-ID werden verpasste Events nachgeliefert; sind sie nicht
+    mehr im Puffer, kommt "resync" und der Client lädt Listen und Anfragen neu.
+    """
+    try:
+        since = int(last_event_id) if last_event_id else None
+    except ValueError:
+        since = None
+    return StreamingResponse(events.stream(user, since), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus-Textformat."""
+    presence_stats["online"] = await presence.online_count()
+    return PlainTextResponse(friends_metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    # Hier kannst du host und port anpassen:
-    uvicorn.run("friends_server:app", host="0.0.0.0", port=8000, reload=True)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Anzahl Prozesse; ab 2 werden Presence und Events über SQLite geteilt")
+    parser.add_argument("--no-reload", action="store_true",
+                        help="ohne automatischen Neustart bei Codeänderungen (bei --workers immer aus)")
+    args = parser.parse_args()
+    if args.workers > 1:
+        # Die Worker importieren dieses Modul neu und übernehmen die Umgebung
+        os.environ.setdefault("FRIENDS_BACKEND", "sqlite")
+        if os.environ["FRIENDS_BACKEND"] == "local":
+            parser.error("--workers braucht ein geteiltes Backend (FRIENDS_BACKEND=sqlite)")
+    # Offene Event-Streams enden nie von selbst; beim Beenden nach 5 s abbrechen
+    uvicorn.run("friends_server:app", host=args.host, port=args.port, workers=args.workers,
+                reload=args.workers == 1 and not args.no_reload, timeout_graceful_shutdown=5)
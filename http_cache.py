@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_TTL = 300  # Sekunden, in denen eine Kopie ohne Rückfrage als frisch gilt
+
+def _atomic_write(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+class CachedResponse:
+    def __init__(self, status_code, content, from_cache=False, stale=False):
+        self.status_code = status_code
+        self.content = content
+        self.from_cache = from_cache
+        self.stale = stale
+
+    def json(self):
+        return json.loads(self.content)
+
+class HttpCache:
+    """
+    HTTP-Cache mit Validatoren (ETag/Last-Modified) auf der Platte.
+    Innerhalb der TTL wird die lokale Kopie ohne Request geliefert, danach
+    per If-None-Match/If-Modified-Since revalidiert. Bei 304 kommt der Body
+    unverändert aus der Datei; der Index wird nur neu geschrieben, wenn sich
+    die Validatoren geändert haben oder der Zeitpunkt für eine TTL zählt.
+    Ist der Hub nicht erreichbar, kommt die lokale Kopie mit stale=True.
+    Mit persist=False bleibt ein Eintrag nur im Speicher (Serverseiten).
+    """
+
+    def __init__(self, directory, transport, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.transport = transport
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+        self.index_file = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+        self._memory = {}  # url -> Eintrag mit "body", für persist=False
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_index(self):
+        _atomic_write(self.index_file, json.dumps(self._index, separators=(",", ":")).encode("utf-8"))
+
+    def _default_path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".body")
+
+    def _read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def fetch(self, url, path=None, ttl=None, persist=True):
+        """
+        Liefert eine CachedResponse für url. path legt fest, wo der Body liegt
+        (Standard: im Cache-Verzeichnis). Ohne path werden nur Antworten mit
+        Validatoren gespeichert, da sich andere nicht revalidieren lassen.
+        persist=False hält Validatoren und Body nur im Speicher, für Seiten,
+        die sich ständig ändern und ohnehin bei jedem Aufruf revalidiert werden.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = dict((self._index if persist else self._memory).get(url, {}))
+        if persist:
+            body_path = path or entry.get("path") or self._default_path(url)
+            have_copy = bool(entry) and os.path.exists(body_path)
+            read_copy = lambda: self._read(body_path)
+        else:
+            have_copy = "body" in entry
+            read_copy = lambda: entry["body"]
+
+        if have_copy and time.time() - entry.get("fetched_at", 0) < ttl:
+            return CachedResponse(200, read_copy(), from_cache=True)
+
+        headers = {}
+        if have_copy:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            resp = self.transport.get(url, headers=headers)
+        except Exception as e:
+            if have_copy:
+                print(f"Cache: Netzwerkfehler bei {url}, nutze lokale Kopie: {e}")
+                return CachedResponse(200, read_copy(), from_cache=True, stale=True)
+            raise
+
+        if resp.status_code == 304 and have_copy:
+            # 304 darf neue Validatoren mitbringen
+            validators = (entry.get("etag"), entry.get("last_modified"))
+            entry["etag"] = resp.headers.get("ETag") or entry.get("etag")
+            entry["last_modified"] = resp.headers.get("Last-Modified") or entry.get("last_modified")
+            entry["fetched_at"] = time.time()
+            with self._lock:
+                if not persist:
+                    self._memory[url] = entry
+                else:
+                    self._index[url] = entry
+                    # Bei ttl=0 wird ohnehin jedes Mal gefragt, fetched_at muss nicht auf die Platte
+                    if ttl > 0 or validators != (entry["etag"], entry["last_modified"]):
+                        self._save_index()
+            return CachedResponse(200, read_copy(), from_cache=True)
+
+        if resp.status_code != 200:
+            if have_copy:
+                return CachedResponse(200, read_copy(), from_cache=True, stale=True)
+            return CachedResponse(resp.status_code, resp.content)
+
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if not persist:
+            with self._lock:
+                if etag or last_modified:
+                    self._memory[url] = {"etag": etag, "last_modified": last_modified,
+                                         "fetched_at": time.time(), "body": resp.content}
+                else:
+                    self._memory.pop(url, None)
+        elif path or etag or last_modified:
+            # Body unverändert speichern, keine Neu-Serialisierung
+            _atomic_write(body_path, resp.content)
+            with self._lock:
+                self._index[url] = {
+                    "path": body_path,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "fetched_at": time.time(),
+                }
+                self._save_index()
+        return CachedResponse(200, resp.content)
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from transport import hub_transport
+
+HUB_SERVERS_URL = "https://hub.nohesi.gg/servers"
+PAGE_SIZE = 10
+MAX_PAGE_WORKERS = 4
+
+def fetch_server_page(page, base_url=HUB_SERVERS_URL, cache=None):
+    """
+    Holt eine einzelne Seite der Serverliste vom Hub.
+    Mit cache (http_cache.HttpCache) wird die Seite bei jedem Aufruf revalidiert;
+    Validatoren und Body bleiben dabei nur im Speicher, da sich die Spielerzahlen
+    ständig ändern und sonst jede Seite samt index.json neu geschrieben würde.
+    Eine veraltete Kopie (Hub nicht erreichbar) zählt als Fehler, damit die
+    Paginierung wie ohne Cache an dieser Seite endet.
+    """
+    url = f"{base_url}?page={page}"
+    if cache is not None:
+        response = cache.fetch(url, ttl=0, persist=False)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        if response.stale:
+            raise RuntimeError("Hub nicht erreichbar, nur veraltete lokale Kopie")
+    else:
+        response = hub_transport.get(url)
+        response.raise_for_status()
+    data = response.json()
+    return data.get("data", {}).get("servers", [])
+
+def _safe_fetch(fetch_page, page):
+    # Fehler beenden die Paginierung wie eine kurze Seite (wie früher die Schleife)
+    try:
+        return fetch_page(page)
+    except Exception as e:
+        print(f"Fehler auf Seite {page}: {e}")
+        return []
+
+def fetch_all_pages(fetch_page, page_size=PAGE_SIZE, max_workers=MAX_PAGE_WORKERS,
+                    key=lambda s: s.get("ip_address"), on_page=None):
+    """
+    Lädt alle Seiten über fetch_page(page) -> Liste.
+    Seite 1 wird zuerst geholt, danach laufen bis zu max_workers Folgeseiten
+    spekulativ parallel. Die erste kurze (oder fehlerhafte) Seite beendet die Suche,
+    spätere Seiten werden verworfen. Die Ergebnisse werden in Seitenreihenfolge
+    und ohne Duplikate (nach key) zusammengeführt.
+    on_page(servers) bekommt jede Seite (ohne Duplikate), sobald sie und alle
+    davor da sind, im aufrufenden Thread und in Seitenreihenfolge.
+    """
+    all_servers = []
+    seen = set()
+    delivered = 0
+
+    def deliver():
+        nonlocal delivered
+        while delivered + 1 in pages and (last_page is None or delivered < last_page):
+            delivered += 1
+            batch = []
+            for s in pages[delivered]:
+                k = key(s)
+                if k is not None:
+                    if k in seen:
+                        continue
+                    seen.add(k)
+                batch.append(s)
+            all_servers.extend(batch)
+            if on_page is not None and batch:
+                on_page(batch)
+
+    pages = {1: _safe_fetch(fetch_page, 1)}
+    last_page = 1 if len(pages[1]) < page_size else None
+    deliver()
+
+    if last_page is None:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = {}
+            next_page = 2
+            while True:
+                # Nachschub nur, solange noch keine kurze Seite gesehen wurde
+                while last_page is None and len(pending) < max_workers:
+                    pending[pool.submit(_safe_fetch, fetch_page, next_page)] = next_page
+                    next_page += 1
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = pending.pop(future)
+                    if last_page is not None and page > last_page:
+                        continue
+                    servers = future.result()
+                    pages[page] = servers
+                    if len(servers) < page_size:
+                        last_page = page
+                deliver()
+                if last_page is not None:
+                    # Spekulative Seiten hinter der letzten Seite abbrechen bzw. ignorieren
+                    for future, page in list(pending.items()):
+                        if page > last_page:
+                            future.cancel()
+                            del pending[future]
+            # Beim Verlassen des with-Blocks wartet der Pool auf noch laufende Requests
+
+    return all_servers
+
+def fetch_all_servers(base_url=HUB_SERVERS_URL, max_workers=MAX_PAGE_WORKERS, cache=None, on_page=None):
+    return fetch_all_pages(lambda page: fetch_server_page(page, base_url, cache), max_workers=max_workers,
+                           on_page=on_page)
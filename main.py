@@ -1,15 +1,27 @@
 import sys
 import os
 import json
-import requests
 import time
+from hub_client import fetch_all_servers
+from transport import hub_transport
+from http_cache import HttpCache
+from ttl_cache import TtlLruCache
+from server_diff import diff_servers, merge_servers
+from server_index import ServerIndex
+from car_index import CarIndex
+from persistence import PersistenceService, atomic_write_json
+from refresh_scheduler import RefreshScheduler, favorites_hot, DEFAULT_INTERVAL
+from server_model import ServerTableModel, ServerFilterProxy, COL_FAVORITE, COL_PLAYERS
+from ping_probe import PingProbe
+import server_cache
+from server_record import parse_servers
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QComboBox, QTableWidget, QTableWidgetItem,
+    QApplication, QWidget, QVBoxLayout, QComboBox, QTableView,
     QLabel, QMainWindow, QPushButton, QMessageBox, QHBoxLayout, QCheckBox,
     QAction, QDialog, QDialogButtonBox, QFormLayout
 )
-from PyQt5.QtCore import Qt, QRunnable, QThreadPool, pyqtSignal, QObject, QTimer
-from PyQt5.QtGui import QColor, QIcon
+from PyQt5.QtCore import Qt, QRunnable, QThreadPool, pyqtSignal, QObject, QTimer, QEvent
+from PyQt5.QtGui import QIcon
 import PyQt5.QtWidgets as QtWidgets
 
 def get_appdata_dir():
@@ -24,8 +36,16 @@ def get_appdata_dir():
 APPDATA_DIR = get_appdata_dir()
 SETTINGS_FILE = os.path.join(APPDATA_DIR, "settings.json")
 FAVORITES_FILE = os.path.join(APPDATA_DIR, "favorites.json")
-SERVERS_FILE = os.path.join(APPDATA_DIR, "servers.json")
+SERVERS_FILE = os.path.join(APPDATA_DIR, "servers.cache")
+LEGACY_SERVERS_FILE = os.path.join(APPDATA_DIR, "servers.json")  # altes Format, wird beim nächsten Speichern ersetzt
 CARS_FILE = os.path.join(APPDATA_DIR, "cars.json")
+HTTP_CACHE_DIR = os.path.join(APPDATA_DIR, "http_cache")
+CARS_CACHE_TTL = 600  # Sekunden ohne Revalidierung der Car-Liste
+CAR_SERVERS_TTL = 120  # Sekunden, bis eine Car-Serverliste im Hintergrund neu geladen wird
+PAGE_BATCH_INTERVAL = 0.15  # Sekunden; schneller eintreffende Seiten gehen gesammelt an die View
+COLUMN_SIZE_ROWS = 100  # Zeilen, die für die Spaltenbreiten vermessen werden (statt alle)
+
+http_cache = HttpCache(HTTP_CACHE_DIR, hub_transport)
 
 def load_favorites():
     try:
@@ -45,8 +65,7 @@ def load_favorites():
 
 def save_favorites(favs):
     try:
-        with open(FAVORITES_FILE, "w") as f:
-            json.dump(list(favs), f)
+        atomic_write_json(FAVORITES_FILE, sorted(favs))
     except Exception as e:
         print(f"Fehler beim Speichern der Favoriten: {e}")
 
@@ -57,18 +76,29 @@ def load_settings():
     return {"language": "en", "theme": "light"}
 
 def save_settings(settings):
-    with open(SETTINGS_FILE, "w") as f:
-        json.dump(settings, f, indent=2)
+    atomic_write_json(SETTINGS_FILE, settings, indent=2)
 
 def load_servers_cache():
-    if os.path.exists(SERVERS_FILE):
-        with open(SERVERS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+    servers = server_cache.read(SERVERS_FILE)
+    if servers is not None:
+        return servers
+    if os.path.exists(LEGACY_SERVERS_FILE):
+        try:
+            with open(LEGACY_SERVERS_FILE, "r", encoding="utf-8") as f:
+                return parse_servers(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Fehler beim Laden des alten Server-Caches: {e}")
     return []
 
 def save_servers_cache(servers):
-    with open(SERVERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(servers, f, indent=2, ensure_ascii=False)
+    """Blockiert je nach Liste einige Millisekunden, daher nur aus Worker-Threads aufrufen."""
+    try:
+        server_cache.write(SERVERS_FILE, servers)
+    except OSError as e:
+        print(f"Fehler beim Speichern des Server-Caches: {e}")
+        return
+    if os.path.exists(LEGACY_SERVERS_FILE):
+        os.remove(LEGACY_SERVERS_FILE)
 
 def load_locale(language_code):
     if language_code == "de":
@@ -97,6 +127,7 @@ def load_locale(language_code):
             "Traffic": "Verkehr",
             "Type": "Typ",
             "loading_servers": "Server werden aktualisiert ...",
+            "loading_servers_progress": "Server werden aktualisiert ... ({count})",
             "Link copied:\n{link}": "Link kopiert:\n{link}",
             "Failed to copy link:\n{e}": "Fehler beim Kopieren des Links:\n{e}",
             "Copy server link": "Server-Link kopieren"
@@ -127,6 +158,7 @@ def load_locale(language_code):
             "Traffic": "Traffic",
             "Type": "Type",
             "loading_servers": "Updating server list ...",
+            "loading_servers_progress": "Updating server list ... ({count})",
             "Link copied:\n{link}": "Link copied:\n{link}",
             "Failed to copy link:\n{e}": "Failed to copy link:\n{e}",
             "Copy server link": "Copy server link"
@@ -140,16 +172,15 @@ def load_cars_json(filepath_or_url):
     """
     try:
         if filepath_or_url.startswith("http"):
-            resp = requests.get(filepath_or_url)
+            # Der Cache legt die Car-JSON unverändert in CARS_FILE ab (auch für Offline-Nutzung)
+            # und revalidiert sie per ETag/Last-Modified statt sie neu zu laden
+            resp = http_cache.fetch(filepath_or_url, path=CARS_FILE, ttl=CARS_CACHE_TTL)
             if resp.status_code == 200 and resp.content:
                 try:
                     data = resp.json()
                 except Exception as e:
                     print(f"Fehler beim Parsen der Car-JSON: {e}")
                     return []
-                # Speichere die Car-JSON lokal für Offline-Nutzung
-                with open(CARS_FILE, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
             else:
                 print(f"Fehler beim Laden der Car-Liste: HTTP {resp.status_code}")
                 return []
@@ -161,66 +192,156 @@ def load_cars_json(filepath_or_url):
         print(f"Fehler beim Laden der Car-Liste: {e}")
         return []
 
+_car_tiers_cache = {"mtime": None, "tiers": {}}
+
+def load_car_tiers():
+    """
+    Liest die verfügbaren Tiers pro Car-Model aus der lokalen Car-JSON.
+    Das Ergebnis bleibt im Speicher, bis sich die Datei ändert.
+    """
+    try:
+        mtime = os.path.getmtime(CARS_FILE)
+    except OSError:
+        return {}
+    if _car_tiers_cache["mtime"] != mtime:
+        try:
+            with open(CARS_FILE, "r", encoding="utf-8") as f:
+                cars_data = json.load(f)
+            _car_tiers_cache["tiers"] = {
+                c["model"]: sorted(int(k) for k in (c.get("tier") or {}).keys())
+                for c in cars_data.get("data", [])
+            }
+        except Exception as e:
+            print(f"Fehler beim Lesen der Car-Tiers: {e}")
+            _car_tiers_cache["tiers"] = {}
+        _car_tiers_cache["mtime"] = mtime
+    return _car_tiers_cache["tiers"]
+
+def resolve_car_tier(car_model, tier=None):
+    # Nimm das niedrigste Tier, falls nicht explizit gesetzt
+    if tier is not None:
+        return tier
+    tiers = load_car_tiers().get(car_model)
+    return tiers[0] if tiers else 0
+
+def fetch_servers_for_car(car_model, tier):
+    """
+    Holt die Serverliste für ein Auto und Tier von der API. Fehler werden weitergereicht.
+    """
+    car_query = f"{car_model}|{tier}"
+    url = f"https://hub.nohesi.gg/servers?car={car_query}"
+    response = hub_transport.get(url)
+    response.raise_for_status()
+    data = response.json()
+    return parse_servers(data.get("data", {}).get("servers", []))
+
 def get_servers_for_car(car_model, tier=None):
     """
     Holt die Serverliste für ein bestimmtes Auto und Tier von der API.
     Wenn kein Tier angegeben ist, wird das niedrigste verfügbare Tier aus der Car-JSON verwendet.
     """
     try:
-        # Lade die Car-Liste lokal
-        if os.path.exists(CARS_FILE):
-            with open(CARS_FILE, "r", encoding="utf-8") as f:
-                cars_data = json.load(f)
-            car_entry = next((c for c in cars_data.get("data", []) if c["model"] == car_model), None)
-            if car_entry and car_entry.get("tier"):
-                # Nimm das niedrigste Tier, falls nicht explizit gesetzt
-                tier_keys = sorted(int(k) for k in car_entry["tier"].keys())
-                tier = tier_keys[0] if tier is None else tier
-            else:
-                tier = 0
-        else:
-            tier = 0
-
-        car_query = f"{car_model}|{tier}"
-        url = f"https://hub.nohesi.gg/servers?car={car_query}"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        return data.get("data", {}).get("servers", [])
+        return fetch_servers_for_car(car_model, resolve_car_tier(car_model, tier))
     except Exception as e:
         print(f"Fehler beim Car-Server-API-Call: {e}")
         return []
 
+class CarServersLoader(QRunnable):
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+        self.signals = CarServersSignals()
+
+    def run(self):
+        car_model, tier = self.key
+        try:
+            servers = fetch_servers_for_car(car_model, tier)
+        except Exception as e:
+            print(f"Fehler beim Car-Server-API-Call: {e}")
+            self.signals.failed.emit(self.key)
+            return
+        self.signals.finished.emit(self.key, servers)
+
 class ServerLoader(QRunnable):
+    """
+    Lädt die Serverliste seitenweise. page liefert die bisher geladenen
+    Seiten als Server-Objekte, sobald sie da sind (gesammelt höchstens alle
+    PAGE_BATCH_INTERVAL Sekunden, Seite 1 sofort), finished danach die
+    vollständige Liste.
+    """
+
     def __init__(self):
         super().__init__()
-        self.signals = WorkerSignals()
+        self.signals = ServerLoaderSignals()
+        self._servers = []
+        self._batch = []
+        self._last_emit = None
+
+    def _on_page(self, page):
+        # Schon hier in Server-Objekte umwandeln, der GUI-Thread bekommt nur fertige Listen
+        servers = parse_servers(page)
+        self._servers.extend(servers)
+        self._batch.extend(servers)
+        now = time.monotonic()
+        if self._last_emit is None or now - self._last_emit >= PAGE_BATCH_INTERVAL:
+            self._last_emit = now
+            self.signals.page.emit(self._batch, len(self._servers))
+            self._batch = []
 
     def run(self):
-        all_servers = []
-        page = 1
-        while True:
-            url = f"https://hub.nohesi.gg/servers?page={page}"
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-                data = response.json()
-                servers = data.get("data", {}).get("servers", [])
-                if not servers:
-                    break
-                all_servers.extend(servers)
-                if len(servers) < 10:
-                    break
-                page += 1
-            except Exception as e:
-                print(f"Fehler auf Seite {page}: {e}")
-                break
-        save_servers_cache(all_servers)
+        # Seite 1 zuerst, danach Folgeseiten parallel (siehe hub_client.fetch_all_pages).
+        # Was noch im Batch liegt, kommt mit finished.
+        try:
+            fetch_all_servers(cache=http_cache, on_page=self._on_page)
+        except Exception as e:
+            # finished muss immer kommen, sonst bleibt der RefreshScheduler auf "lädt" stehen
+            print(f"Fehler beim Laden der Serverliste: {e}")
+            self.signals.finished.emit([])
+            return
+        all_servers = self._servers
         self.signals.finished.emit(all_servers)
+        # Erst anzeigen, dann im selben Worker-Thread speichern
+        if all_servers:
+            save_servers_cache(all_servers)
+
+class CarsLoader(QRunnable):
+    def __init__(self):
+        super().__init__()
+        self.signals = WorkerSignals()
+
+    def run(self):
+        cars = load_cars_json("https://hub.nohesi.gg/servers/cars")
+        self.signals.finished.emit(cars)
+
+class PingLoader(QRunnable):
+    def __init__(self, probe, addresses):
+        super().__init__()
+        self.probe = probe
+        self.addresses = addresses
+        self.signals = PingSignals()
+
+    def run(self):
+        try:
+            results = self.probe.sweep_blocking(self.addresses)
+        except Exception as e:
+            print(f"Fehler beim Ping: {e}")
+            results = {}
+        self.signals.finished.emit(results)
 
 class WorkerSignals(QObject):
     finished = pyqtSignal(list)
 
+class ServerLoaderSignals(QObject):
+    page = pyqtSignal(list, int)  # neue Server, bisher geladen
+    finished = pyqtSignal(list)
+
+class PingSignals(QObject):
+    finished = pyqtSignal(dict)
+
+class CarServersSignals(QObject):
+    finished = pyqtSignal(object, list)
+    failed = pyqtSignal(object)
+
 class AboutDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -244,7 +365,7 @@ class ServerBrowser(QMainWindow):
         if self.settings.get("theme") == "dark":
             dark_stylesheet = """
                 QWidget { background-color: #1e1e1e; color: #dddddd; }
-                QComboBox, QLineEdit, QPushButton, QTableWidget, QCheckBox, QLabel {
+                QComboBox, QLineEdit, QPushButton, QTableView, QCheckBox, QLabel {
                     background-color: #2b2b2b;
                     color: #ffffff;
                     border: 1px solid #555555;
@@ -257,6 +378,7 @@ class ServerBrowser(QMainWindow):
             self.setStyleSheet(dark_stylesheet)
         else:
             self.setStyleSheet("")
+        self.table_model.set_dark(self.settings.get("theme") == "dark")
 
     def init_menu(self):
         menubar = self.menuBar()
@@ -295,12 +417,12 @@ class ServerBrowser(QMainWindow):
 
     def set_theme(self, theme):
         self.settings["theme"] = theme
-        save_settings(self.settings)
+        self.persistence.mark_dirty("settings")
         self.apply_theme()
 
     def set_language(self, lang):
         self.settings["language"] = lang
-        save_settings(self.settings)
+        self.persistence.mark_dirty("settings")
         self.tr = load_locale(lang)
         self.update_ui_texts()
 
@@ -309,25 +431,50 @@ class ServerBrowser(QMainWindow):
         self.sort_checkbox.setText(self.tr.get("most_played", "Sort by Most Played"))
         self.only_favs_checkbox.setText(self.tr.get("favorites_only", "Only Favorites"))
         self.join_button.setText(self.tr.get("join_now", "Join Now"))
-        self.table.setHorizontalHeaderLabels([
-            "★", self.tr.get("Name", "Name"), self.tr.get("IP", "IP"),
-            self.tr.get("Region", "Region"), self.tr.get("Map", "Map"),
-            self.tr.get("Players", "Players"), self.tr.get("Traffic", "Traffic"),
-            self.tr.get("Type", "Type"), "Tier", "VIP"
-        ])
+        self.table_model.set_translations(self.tr)
         self.init_filters()
+        self.apply_filters()
         self.menuBar().clear()
         self.init_menu()
 
     def __init__(self):
         super().__init__()
+        self._startup_time = time.perf_counter()
         self.settings = load_settings()
+        # Settings und Favoriten werden gesammelt und verzögert geschrieben (und beim Beenden)
+        self.persistence = PersistenceService(parent=self)
+        self.persistence.register("settings", lambda: save_settings(self.settings))
+        self.persistence.register("favorites", lambda: save_favorites(self.favorites))
         self.tr = load_locale(self.settings.get("language", "en"))
         self.setWindowTitle(self.tr.get("title", "No Hesi Server Browser"))
         self.init_menu()
         self.resize(1000, 600)
         self.threadpool = QThreadPool()
         self.favorites = load_favorites()
+        # (model, tier) -> Serverliste, stale-while-revalidate
+        self.car_servers_cache = TtlLruCache(maxsize=32, ttl=CAR_SERVERS_TTL)
+        self._car_lookups_in_flight = set()
+        # (model, tier), bei denen der CarIndex einmal mit der API übereinstimmte bzw. danebenlag.
+        # Danebenliegende Schlüssel werden für den Rest der Sitzung wieder über die API beantwortet.
+        self._car_keys_verified = set()
+        self._car_index_mismatches = set()
+        # Latenz per TCP-Connect, nur veraltete Messwerte werden neu gemessen
+        self.ping_probe = PingProbe()
+        self._ping_in_flight = False
+        self._ping_pending = False
+        # Sortierung per Klick auf die Spaltenköpfe (-1 = Reihenfolge der API)
+        self.sort_column = self.settings.get("sort_column", -1)
+        self.sort_order = Qt.DescendingOrder if self.settings.get("sort_descending") else Qt.AscendingOrder
+        # Automatisches Neuladen der Serverliste (Intervall in Sekunden, anpassbar in settings.json)
+        self._servers_loaded_once = False
+        self._servers_before_load = []  # Stand vor dem laufenden Ladevorgang (für favorites_hot)
+        self._changed_during_load = False
+        self._first_page_logged = False
+        self.refresh_scheduler = RefreshScheduler(
+            self.load_all_servers_async,
+            base_interval=self.settings.get("refresh_interval", DEFAULT_INTERVAL),
+            parent=self
+        )
 
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -337,16 +484,16 @@ class ServerBrowser(QMainWindow):
         self.filter_layout = QHBoxLayout()
 
         self.region_filter = QComboBox()
-        self.region_filter.currentTextChanged.connect(self.on_filter_change)
+        self.region_filter.currentIndexChanged.connect(self.on_filter_change)
 
         self.density_filter = QComboBox()
-        self.density_filter.currentTextChanged.connect(self.on_filter_change)
+        self.density_filter.currentIndexChanged.connect(self.on_filter_change)
 
         self.type_filter = QComboBox()
-        self.type_filter.currentTextChanged.connect(self.on_filter_change)
+        self.type_filter.currentIndexChanged.connect(self.on_filter_change)
 
         self.map_filter = QComboBox()
-        self.map_filter.currentTextChanged.connect(self.on_filter_change)
+        self.map_filter.currentIndexChanged.connect(self.on_filter_change)
 
         self.car_filter = QComboBox()
         self.car_filter.addItem("All Cars")
@@ -371,10 +518,24 @@ class ServerBrowser(QMainWindow):
         self.info_label.setAlignment(Qt.AlignCenter)
         self.info_label.setVisible(False)
 
-        self.table = QTableWidget()
-        self.table.cellDoubleClicked.connect(self.handle_click)
+        # Model/View: das Modell hält alle Server, der Proxy filtert und sortiert
+        self.table_model = ServerTableModel(self.favorites, self.tr, self)
+        self.server_index = ServerIndex()
+        self.car_index = CarIndex()
+        self.proxy = ServerFilterProxy(self.server_index, self)
+        self.proxy.setSourceModel(self.table_model)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.doubleClicked.connect(self.handle_click)
         self.table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self.show_table_context_menu)
+        header = self.table.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(self.sort_column, self.sort_order)
+        header.sortIndicatorChanged.connect(self.on_sort_indicator_changed)
+        header.setResizeContentsPrecision(COLUMN_SIZE_ROWS)
+        self._columns_sized = False
 
         self.join_button = QPushButton(self.tr.get("join_now", "Join Now"))
         self.join_button.setFixedHeight(40)
@@ -388,25 +549,113 @@ class ServerBrowser(QMainWindow):
         self.layout.addWidget(self.join_button)
         self.layout.addWidget(self.info_label)  # Info-Label jetzt unter Join Now
 
+        # Stufe 1: nur aus dem lokalen Cache rendern, das Netzwerk kommt nach dem ersten Paint
         self.all_servers = load_servers_cache()
-        self.cars_list = load_cars_json("https://hub.nohesi.gg/servers/cars")
-        for car in sorted(self.cars_list):
-            self.car_filter.addItem(car)
+        self.server_index.rebuild(self.all_servers)
+        self.car_index.rebuild(self.all_servers)
+        self.table_model.set_servers(self.all_servers)
+        self.size_columns()
+        self.cars_list = load_cars_json(CARS_FILE) if os.path.exists(CARS_FILE) else []
         self.init_filters()
         self.apply_filters()
         self.apply_theme()
+        self._first_paint_done = False
+        self._pending_startup_loads = {"cars", "servers"}
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            # singleShot(0) läuft erst, nachdem die Paint-Events des Fensters abgearbeitet sind
+            QTimer.singleShot(0, self.on_first_paint)
+
+    def on_first_paint(self):
+        print(f"[STARTUP] time-to-first-paint: {time.perf_counter() - self._startup_time:.3f}s")
+        # Stufe 2: Cars und Server im Hintergrund aktualisieren
+        self.load_cars_async()
+        self.refresh_scheduler.refresh_now()
+        self.start_ping_sweep()
+
+    def closeEvent(self, event):
+        self.persistence.flush()
+        super().closeEvent(event)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            if self.isMinimized():
+                self.refresh_scheduler.pause()
+            else:
+                self.refresh_scheduler.resume()
 
-        self.load_all_servers_async()
+    def mark_startup_load_done(self, name):
+        if name in self._pending_startup_loads:
+            self._pending_startup_loads.discard(name)
+            if not self._pending_startup_loads:
+                print(f"[STARTUP] time-to-fresh-data: {time.perf_counter() - self._startup_time:.3f}s")
+
+    def load_cars_async(self):
+        loader = CarsLoader()
+        loader.signals.finished.connect(self.on_cars_loaded)
+        self.threadpool.start(loader)
+
+    def on_cars_loaded(self, cars):
+        if cars:
+            self.cars_list = cars
+            self.update_car_filter()
+        self.mark_startup_load_done("cars")
 
     def load_all_servers_async(self):
-        loading_text = self.tr.get("loading_servers", "Server werden aktualisiert ...")
-        self.info_label.setText(loading_text)
-        self.info_label.setVisible(True)
+        # Nur beim ersten Laden anzeigen, automatische Aktualisierungen laufen still im Hintergrund
+        if not self._servers_loaded_once:
+            loading_text = self.tr.get("loading_servers", "Server werden aktualisiert ...")
+            self.info_label.setText(loading_text)
+            self.info_label.setVisible(True)
         self._load_start_time = time.time()
+        self._servers_before_load = self.all_servers
         loader = ServerLoader()
+        loader.signals.page.connect(self.on_servers_page)
         loader.signals.finished.connect(self.on_servers_loaded)
         self.threadpool.start(loader)
 
+    def on_servers_page(self, servers, loaded):
+        """
+        Übernimmt einen Teil der Liste, während der Rest noch lädt: neue
+        Server erscheinen sofort, geänderte werden aktualisiert. Entfernt
+        wird erst in on_servers_loaded, wenn die Liste vollständig ist.
+        """
+        if not self._first_page_logged:
+            self._first_page_logged = True
+            print(f"[STARTUP] time-to-first-page: {time.perf_counter() - self._startup_time:.3f}s")
+        if not self._servers_loaded_once:
+            text = self.tr.get("loading_servers_progress", "Server werden aktualisiert ... ({count})")
+            self.info_label.setText(text.format(count=loaded))
+        merged, diff = merge_servers(self.all_servers, servers)
+        if not diff:
+            return
+        self.all_servers = merged
+        self._changed_during_load = True
+        self.server_index.apply_diff(diff)
+        self.table_model.apply_diff(merged, diff)
+        self.size_columns()
+        # Filter und Favoriten bleiben wie eingestellt, nur neue Werte kommen in die Combos
+        if self.filter_values() != self._filter_values:
+            self.init_filters(reset_favorites=False)
+            self.apply_filters()
+        else:
+            self.update_filter_counts()
+
+    def size_columns(self):
+        """
+        Passt die Spaltenbreiten einmal an, sobald es Zeilen gibt (aus dem
+        Cache oder mit der ersten Seite). Jedes weitere Mal würde wieder
+        die Tabelle vermessen, bei jedem Batch und jeder Aktualisierung.
+        """
+        if self._columns_sized or not self.table_model.rowCount():
+            return
+        self._columns_sized = True
+        self.table.resizeColumnsToContents()
+
     def on_servers_loaded(self, servers):
         elapsed = time.time() - getattr(self, "_load_start_time", time.time())
         count = len(servers)
@@ -414,55 +663,111 @@ class ServerBrowser(QMainWindow):
             info = f"Server aktualisiert: {count} Server, Dauer: {elapsed:.2f} Sekunden"
         else:
             info = f"Servers updated: {count} servers, took {elapsed:.2f} seconds"
+        # Mit dem Stand vor den Batches vergleichen, damit favorites_hot den ganzen Ladevorgang sieht
+        before = self._servers_before_load
+        changed_during_load, self._changed_during_load = self._changed_during_load, False
+        if not servers and self.all_servers:
+            # Laden fehlgeschlagen: bisherige Liste behalten statt die Tabelle zu leeren
+            print("Serverliste leer, behalte die bisherigen Server")
+            self.info_label.setVisible(False)
+            self.refresh_scheduler.load_finished(changed=False)
+            self.mark_startup_load_done("servers")
+            return
+        hot = favorites_hot(before, servers, self.favorites)
+        # Nur die Unterschiede an die View geben, Auswahl und Scrollposition bleiben erhalten.
+        # Nach den Batches bleiben hier vor allem entfernte Server und die Reihenfolge der API.
+        diff = diff_servers(self.all_servers, servers)
         self.all_servers = servers
-        self.only_favs_checkbox.setChecked(False)
-        self.info_label.setText(info)
-        self.info_label.setVisible(True)
-        QTimer.singleShot(3500, lambda: self.info_label.setVisible(False))
-        self.init_filters()
+        # Index vor dem Modell aktualisieren, damit neue Zeilen gleich richtig gefiltert werden
+        self.server_index.apply_diff(diff)
+        self.car_index.rebuild(servers)
+        self.table_model.apply_diff(servers, diff)
+        self.size_columns()
+        first_load = not self._servers_loaded_once
+        self._servers_loaded_once = True
+        if first_load:
+            self.info_label.setText(info)
+            self.info_label.setVisible(True)
+            QTimer.singleShot(3500, lambda: self.info_label.setVisible(False))
+        # Combos nur neu aufbauen, wenn sich die auswählbaren Werte geändert haben.
+        # Die Favoriten-Checkbox wird nur beim ersten Laden zurückgesetzt.
+        if self.filter_values() != self._filter_values:
+            self.init_filters(reset_favorites=first_load)
+        else:
+            self.update_filter_counts()
+            if first_load:
+                self.init_favorites_checkbox()
         self.apply_filters()
+        self.refresh_scheduler.load_finished(changed=bool(diff) or changed_during_load, hot=hot)
+        self.mark_startup_load_done("servers")
+        self.start_ping_sweep()
+
+    def start_ping_sweep(self):
+        # Nie zwei Durchläufe gleichzeitig; kommt währenddessen eine neue Liste, danach noch einmal
+        if self._ping_in_flight:
+            self._ping_pending = True
+            return
+        addresses = [s.ip_address for s in self.all_servers if s.ip_address]
+        if not self.ping_probe.stale(addresses):
+            return
+        self._ping_in_flight = True
+        loader = PingLoader(self.ping_probe, addresses)
+        loader.signals.finished.connect(self.on_pings_loaded)
+        self.threadpool.start(loader)
 
-    def init_filters(self):
-        for combo, default_text, setting_key in zip(
-            [self.region_filter, self.density_filter, self.type_filter, self.map_filter],
-            [self.tr.get("All Regions", "All Regions"), self.tr.get("All Traffic", "All Traffic"),
-             self.tr.get("All Types", "All Types"), self.tr.get("All Maps", "All Maps")],
-            ["last_region", "last_density", "last_type", "last_map"]
-        ):
+    def on_pings_loaded(self, results):
+        self._ping_in_flight = False
+        self.table_model.set_pings(results)
+        if self._ping_pending:
+            self._ping_pending = False
+            self.start_ping_sweep()
+
+    def filter_combos(self):
+        # (Feld, Combo, Text für "alle", Settings-Schlüssel)
+        return [
+            ("region", self.region_filter, "All Regions", "last_region"),
+            ("density", self.density_filter, "All Traffic", "last_density"),
+            ("type", self.type_filter, "All Types", "last_type"),
+            ("map", self.map_filter, "All Maps", "last_map"),
+        ]
+
+    def init_filters(self, reset_favorites=True):
+        # Werte und Anzahl kommen fertig aus dem ServerIndex, der Wert steht in den Item-Daten
+        self._filter_values = self.filter_values()
+        for field, combo, all_text, setting_key in self.filter_combos():
             combo.blockSignals(True)
             combo.clear()
-            combo.addItem(default_text)
+            combo.addItem(self.tr.get(all_text, all_text), None)
+            for v, count in self.server_index.values(field):
+                combo.addItem(f"{v} ({count})", v)
+            saved = self.settings.get(setting_key)
+            index = combo.findData(saved) if saved is not None else -1
+            combo.setCurrentIndex(max(index, 0))
             combo.blockSignals(False)
 
-        regions = sorted(set(s.get("region", "") for s in self.all_servers))
-        densities = sorted(set(s.get("density", "") for s in self.all_servers))
-        types = sorted(set(s.get("type", "") for s in self.all_servers))
-        maps = sorted(set(s.get("map", "") for s in self.all_servers))
-
-        for values, box in zip(
-            [regions, densities, types, maps],
-            [self.region_filter, self.density_filter, self.type_filter, self.map_filter]
-        ):
-            unique_values = sorted(set(v for v in values if v))
-            for v in unique_values:
-                if v:
-                    box.addItem(v)
-
-        self.region_filter.setCurrentText(self.settings.get("last_region", self.tr.get("All Regions", "All Regions")))
-        self.density_filter.setCurrentText(self.settings.get("last_density", self.tr.get("All Traffic", "All Traffic")))
-        self.type_filter.setCurrentText(self.settings.get("last_type", self.tr.get("All Types", "All Types")))
-        self.map_filter.setCurrentText(self.settings.get("last_map", self.tr.get("All Maps", "All Maps")))
-
         # Car-Filter aktualisieren
-        current_car = self.car_filter.currentText()
-        self.car_filter.blockSignals(True)
-        self.car_filter.clear()
-        self.car_filter.addItem("All Cars")
-        for car in sorted(self.cars_list):
-            self.car_filter.addItem(car)
-        self.car_filter.setCurrentText(current_car if current_car in self.cars_list else "All Cars")
-        self.car_filter.blockSignals(False)
+        self.update_car_filter()
+
+        if reset_favorites:
+            self.init_favorites_checkbox()
+
+    def filter_values(self):
+        return tuple(
+            tuple(v for v, _ in self.server_index.values(field))
+            for field, _, _, _ in self.filter_combos()
+        )
 
+    def update_filter_counts(self):
+        # Gleiche Werte wie bisher: nur die Anzahl in den Texten anpassen
+        for field, combo, _, _ in self.filter_combos():
+            counts = dict(self.server_index.values(field))
+            combo.blockSignals(True)
+            for i in range(1, combo.count()):
+                v = combo.itemData(i)
+                combo.setItemText(i, f"{v} ({counts.get(v, 0)})")
+            combo.blockSignals(False)
+
+    def init_favorites_checkbox(self):
         # Favoriten-Checkbox initialisieren:
         if self.favorites:
             self.only_favs_checkbox.setChecked(True)
@@ -471,21 +776,27 @@ class ServerBrowser(QMainWindow):
             last_checked = self.settings.get("only_favs_checked", False)
             self.only_favs_checkbox.setChecked(last_checked)
 
+    def update_car_filter(self):
+        current_car = self.car_filter.currentText()
+        self.car_filter.blockSignals(True)
+        self.car_filter.clear()
+        self.car_filter.addItem("All Cars")
+        for car in sorted(self.cars_list):
+            self.car_filter.addItem(car)
+        self.car_filter.setCurrentText(current_car if current_car in self.cars_list else "All Cars")
+        self.car_filter.blockSignals(False)
+        if current_car != self.car_filter.currentText():
+            self.apply_filters()
+
     def on_filter_change(self):
-        self.settings["last_region"] = self.region_filter.currentText()
-        self.settings["last_density"] = self.density_filter.currentText()
-        self.settings["last_type"] = self.type_filter.currentText()
-        self.settings["last_map"] = self.map_filter.currentText()
+        for _, combo, _, setting_key in self.filter_combos():
+            self.settings[setting_key] = combo.currentData()
         # Speichere auch den Zustand der Favoriten-Checkbox
         self.settings["only_favs_checked"] = self.only_favs_checkbox.isChecked()
-        save_settings(self.settings)
+        self.persistence.mark_dirty("settings")
         self.apply_filters()
 
     def apply_filters(self):
-        region = self.region_filter.currentText()
-        density = self.density_filter.currentText()
-        server_type = self.type_filter.currentText()
-        map_val = self.map_filter.currentText()
         car_model = self.car_filter.currentText()
         sort_by_players = self.sort_checkbox.isChecked()
 
@@ -496,95 +807,114 @@ class ServerBrowser(QMainWindow):
             only_favs = False
             self.only_favs_checkbox.setChecked(False)
 
-        # Car-Filter: Hole Server direkt von der API, wenn ein Auto gewählt ist
+        # Car-Filter: sofort aus dem CarIndex, die API nur einmal pro Car zur Kontrolle.
+        # Kann der Index nicht antworten oder lag er daneben, wie bisher über den API-Cache.
+        only_ips = None
         if car_model != "All Cars":
-            print(f"[DEBUG] apply_filters: car_model={car_model}")  # Debug-Ausgabe
-            filtered = get_servers_for_car(car_model, tier=None)  # tier=None, damit das niedrigste Tier gewählt wird
-        else:
-            filtered = self.all_servers
-
-        if region != self.tr.get("All Regions", "All Regions"):
-            filtered = [s for s in filtered if s.get("region") == region]
-        if density != self.tr.get("All Traffic", "All Traffic"):
-            filtered = [s for s in filtered if s.get("density") == density]
-        if server_type != self.tr.get("All Types", "All Types"):
-            filtered = [s for s in filtered if s.get("type") == server_type]
-        if map_val != self.tr.get("All Maps", "All Maps"):
-            filtered = [s for s in filtered if s.get("map") == map_val]
+            key = (car_model, resolve_car_tier(car_model))  # niedrigstes Tier, wie bisher
+            indexed = None if key in self._car_index_mismatches else self.car_index.lookup(*key)
+            cached = self.car_servers_cache.get(key)
+            if indexed is not None and self.car_index_agrees(key, indexed):
+                only_ips = indexed
+            elif cached is None:
+                only_ips = set()
+                self.request_car_servers(key)
+            else:
+                car_servers, fresh = cached
+                only_ips = {s.ip_address for s in car_servers}
+                if not fresh:
+                    self.request_car_servers(key)
         if only_favs:
-            filtered = [s for s in filtered if s.get("ip_address") in self.favorites]
+            only_ips = set(self.favorites) if only_ips is None else only_ips & self.favorites
+
+        # None in den Item-Daten = "alle"
+        self.proxy.set_filters(
+            {field: combo.currentData() for field, combo, _, _ in self.filter_combos()},
+            only_ips
+        )
         if sort_by_players:
-            filtered.sort(key=lambda x: x.get("clients", 0), reverse=True)
-
-        self.populate_table(filtered)
-
-    def populate_table(self, data):
-        # Neue Spalte für VIP-Slots einfügen (insgesamt 10 Spalten)
-        self.table.setRowCount(len(data))
-        self.table.setColumnCount(10)
-        self.table.setHorizontalHeaderLabels([
-            "★", self.tr.get("Name", "Name"), self.tr.get("IP", "IP"),
-            self.tr.get("Region", "Region"), self.tr.get("Map", "Map"),
-            self.tr.get("Players", "Players"), self.tr.get("Traffic", "Traffic"),
-            self.tr.get("Type", "Type"), "Tier", "VIP"
-        ])
-
-        for row, s in enumerate(data):
-            ip = s.get("ip_address", "")
-            fav_mark = "★" if ip in self.favorites else "☆"
-            fav_item = QTableWidgetItem(fav_mark)
-            fav_item.setTextAlignment(Qt.AlignCenter)
-            fav_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            if self.settings.get("theme") == "dark":
-                fav_item.setBackground(QColor("#2b2b2b"))
-            self.table.setItem(row, 0, fav_item)
-
-            # Standardspalten
-            for col, key in enumerate(["name", "ip_address", "region", "map", "clients", "density", "type"], start=1):
-                if key == "clients":
-                    text = f"{s.get('clients', 0)}/{s.get('maxclients', 0)}"
-                else:
-                    text = self.tr.get(s.get(key, ""), s.get(key, ""))
-                item = QTableWidgetItem(text)
-                item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-                self.table.setItem(row, col, item)
-
-            # Tier-Spalte (Spalte 8)
-            tier_value = ""
-            if "type" in s and isinstance(s["type"], str) and s["type"].lower().startswith("tier"):
-                tier_value = s["type"].replace("Tier", "")
-            elif "tier3_cars" in s:
-                tier_value = "3"
-            else:
-                tier_value = ""
-            tier_item = QTableWidgetItem(str(tier_value))
-            tier_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            self.table.setItem(row, 8, tier_item)
-
-            # VIP-Slots-Spalte (Spalte 9)
-            vip = s.get("vip_slots", 0)
-            max_vip = s.get("max_vip_slots", 0)
-            vip_text = f"{vip}/{max_vip}" if max_vip else str(vip)
-            vip_item = QTableWidgetItem(vip_text)
-            vip_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            self.table.setItem(row, 9, vip_item)
+            column, order = COL_PLAYERS, Qt.DescendingOrder
+        else:
+            column, order = self.sort_column, self.sort_order
+        header = self.table.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(column, order)
+        header.blockSignals(False)
+        # Nur bei geänderter Sortierung neu ordnen; die Filter hat set_filters schon neu angewendet
+        if (column, order) != (self.table_model.sort_column, self.table_model.sort_order):
+            self.proxy.sort(column, order)
+
+    def on_sort_indicator_changed(self, column, order):
+        # Klick auf einen Spaltenkopf ersetzt "Nach Spielern sortieren"
+        self.sort_column = column
+        self.sort_order = order
+        self.settings["sort_column"] = column
+        self.settings["sort_descending"] = order == Qt.DescendingOrder
+        self.persistence.mark_dirty("settings")
+        self.sort_checkbox.blockSignals(True)
+        self.sort_checkbox.setChecked(False)
+        self.sort_checkbox.blockSignals(False)
+        self.apply_filters()
 
-        self.table.resizeColumnsToContents()
+    def request_car_servers(self, key):
+        # Gleiche (model, tier)-Anfragen, die schon laufen, werden zusammengelegt
+        if key in self._car_lookups_in_flight:
+            return
+        self._car_lookups_in_flight.add(key)
+        loader = CarServersLoader(key)
+        loader.signals.finished.connect(self.on_car_servers_loaded)
+        loader.signals.failed.connect(self._car_lookups_in_flight.discard)
+        self.threadpool.start(loader)
+
+    def car_index_agrees(self, key, indexed):
+        """
+        Gleicht die Index-Antwort für key einmal mit der API ab. Solange deren
+        Antwort aussteht, gilt der Index; False nur bei einer Abweichung.
+        """
+        if key in self._car_keys_verified:
+            return True
+        # Der Index aus dem Start-Cache kann Server enthalten, die es nicht mehr gibt;
+        # verglichen wird erst, wenn er aus einer vollständig geladenen Liste stammt
+        if not self._servers_loaded_once:
+            return True
+        cached = self.car_servers_cache.get(key)
+        if cached is None or not cached[1]:
+            self.request_car_servers(key)
+            return True
+        # Nur Server vergleichen, aus denen der Index gebaut ist; die API-Liste kann neuer sein
+        remote = {s.ip_address for s in cached[0]} & self.car_index.keys()
+        if indexed == remote:
+            self._car_keys_verified.add(key)
+            return True
+        self._car_index_mismatches.add(key)
+        print(f"Car-Index weicht für {key[0]} (Tier {key[1]}) von der API ab: "
+              f"{len(indexed - remote)} zu viel, {len(remote - indexed)} fehlen")
+        return False
+
+    def on_car_servers_loaded(self, key, servers):
+        self._car_lookups_in_flight.discard(key)
+        self.car_servers_cache.put(key, servers)
+        # Der Abgleich mit dem Index läuft in apply_filters (car_index_agrees)
+        car_model = self.car_filter.currentText()
+        if car_model != "All Cars" and key == (car_model, resolve_car_tier(car_model)):
+            self.apply_filters()
 
-    def handle_click(self, row, column):
-        if column == 0:
-            ip = self.table.item(row, 2).text()
+    def handle_click(self, index):
+        row = index.row()
+        if index.column() == COL_FAVORITE:
+            ip = self.proxy.server_at(row).ip_address
             if ip in self.favorites:
                 self.favorites.remove(ip)
             else:
                 self.favorites.add(ip)
-            save_favorites(self.favorites)
+            self.persistence.mark_dirty("favorites")
+            self.table_model.favorite_changed(ip)
             self.apply_filters()
         else:
             self.try_join_server_by_row(row)
 
     def join_selected_server(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row >= 0:
             self.try_join_server_by_row(row)
         else:
@@ -592,7 +922,7 @@ class ServerBrowser(QMainWindow):
                                      self.tr.get("Please select a server first.", "Please select a server first."))
 
     def try_join_server_by_row(self, row):
-        ip_port = self.table.item(row, 2).text()
+        ip_port = self.proxy.server_at(row).ip_address
         try:
             ip, port = ip_port.split(":")
             acmanager_url = f"acmanager://race/online/join?ip={ip}&httpPort={port}&password="
@@ -613,10 +943,10 @@ class ServerBrowser(QMainWindow):
 
     def copy_selected_server_link(self, row=None):
         if row is None:
-            row = self.table.currentRow()
+            row = self.table.currentIndex().row()
         if row < 0:
             return
-        ip_port = self.table.item(row, 2).text()
+        ip_port = self.proxy.server_at(row).ip_address
         try:
             ip, port = ip_port.split(":")
             link = f"https://acstuff.club/s/q:race/online/join?ip={ip}&httpPort={port}"
@@ -644,6 +974,7 @@ if __name__ == "__main__":
     # Stelle sicher, dass das Fenster als Hauptfenster erkannt wird (Taskbar-Icon)
     window.setWindowFlags(window.windowFlags() & ~Qt.WindowStaysOnTopHint)
     window.apply_theme()
+    # Ausstehende Settings/Favoriten auch beim Beenden ohne closeEvent schreiben
+    app.aboutToQuit.connect(window.persistence.flush)
     window.show()
     sys.exit(app.exec_())
-`
\ No newline at end of file
@@ -0,0 +1,49 @@
+import json
+import os
+
+from PyQt5.QtCore import QObject, QTimer
+
+FLUSH_DELAY_MS = 750
+
+def atomic_write_json(path, data, **kwargs):
+    """
+    Schreibt erst in eine temporäre Datei und ersetzt dann das Original.
+    Ein Absturz mitten im Schreiben hinterlässt so nie eine halbe Datei.
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp, path)
+
+class PersistenceService(QObject):
+    """
+    Sammelt geänderte Zustände (Settings, Favoriten) und schreibt sie
+    gebündelt nach einer kurzen Ruhephase bzw. beim Beenden.
+    """
+
+    def __init__(self, delay_ms=FLUSH_DELAY_MS, parent=None):
+        super().__init__(parent)
+        self._writers = {}
+        self._dirty = set()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def register(self, name, writer):
+        """writer() schreibt den aktuellen Zustand von name auf die Platte."""
+        self._writers[name] = writer
+
+    def mark_dirty(self, name):
+        self._dirty.add(name)
+        # Jede weitere Änderung verschiebt das Schreiben (Debounce)
+        self.timer.start()
+
+    def flush(self):
+        self.timer.stop()
+        dirty, self._dirty = self._dirty, set()
+        for name in sorted(dirty):
+            try:
+                self._writers[name]()
+            except Exception as e:
+                print(f"Fehler beim Speichern von {name}: {e}")
@@ -0,0 +1,97 @@
+import asyncio
+import socket
+import time
+
+from ttl_cache import TtlLruCache
+
+PROBE_TIMEOUT = 1.5     # Sekunden; wer langsamer antwortet, ist zum Fahren ohnehin zu weit weg
+# Gleichzeitig offene Verbindungsversuche. Mehr macht den Durchlauf kaum schneller, verfälscht
+# aber die Messwerte, weil jede Antwort hinter allen anderen im Event-Loop warten muss.
+PROBE_CONCURRENCY = 32
+PING_TTL = 120          # Sekunden, danach wird ein Server neu gemessen
+
+def split_address(address):
+    """Zerlegt "host:port" in (host, port), None bei ungültiger Adresse."""
+    host, sep, port = address.rpartition(":")
+    if not sep or not host or not port.isdigit():
+        return None
+    return host.strip("[]"), int(port)
+
+class PingProbe:
+    """
+    Misst die Latenz zu Servern über die Dauer eines TCP-Verbindungsaufbaus
+    zu deren ip_address (host:port). Die Verbindungen eines Durchlaufs
+    laufen parallel (begrenzt über ein Semaphor), hängende Server kosten
+    so nicht je einen Timeout nacheinander. Ergebnisse
+    (Millisekunden, None = nicht erreichbar) landen in einem TTL-Cache;
+    gemessen wird nur, was fehlt oder veraltet ist.
+    """
+
+    def __init__(self, timeout=PROBE_TIMEOUT, concurrency=PROBE_CONCURRENCY, ttl=PING_TTL,
+                 clock=time.monotonic):
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.cache = TtlLruCache(maxsize=4096, ttl=ttl, clock=clock)
+
+    def get(self, address):
+        """Letzter Messwert in ms (auch veraltet) oder None."""
+        cached = self.cache.get(address)
+        return cached[0] if cached else None
+
+    def stale(self, addresses):
+        """Adressen ohne oder mit abgelaufenem Messwert, ohne Duplikate."""
+        result = []
+        for address in dict.fromkeys(addresses):
+            cached = self.cache.get(address)
+            if cached is None or not cached[1]:
+                result.append(address)
+        return result
+
+    async def probe_one(self, address):
+        parsed = split_address(address)
+        if parsed is None:
+            return None
+        loop = asyncio.get_running_loop()
+        try:
+            # Auflösen vor der Messung; IP-Adressen ohne Umweg über den Thread-Pool
+            try:
+                infos = socket.getaddrinfo(*parsed, type=socket.SOCK_STREAM, flags=socket.AI_NUMERICHOST)
+            except socket.gaierror:
+                infos = await loop.getaddrinfo(*parsed, type=socket.SOCK_STREAM)
+            family, sock_type, proto, _, sockaddr = infos[0]
+            sock = socket.socket(family, sock_type, proto)
+        except OSError:
+            return None
+        sock.setblocking(False)
+
+        async def timed_connect():
+            # Nur der Verbindungsaufbau selbst, ohne Transport/StreamReader wie bei open_connection
+            start = time.perf_counter()
+            await loop.sock_connect(sock, sockaddr)
+            return (time.perf_counter() - start) * 1000
+
+        try:
+            return await asyncio.wait_for(timed_connect(), self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        finally:
+            sock.close()
+
+    async def sweep(self, addresses):
+        """Misst alle veralteten Adressen. Gibt {address: ms oder None} für die gemessenen zurück."""
+        todo = self.stale(addresses)
+        if not todo:
+            return {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(address):
+            async with semaphore:
+                result = await self.probe_one(address)
+            self.cache.put(address, result)
+            return address, result
+
+        return dict(await asyncio.gather(*(bounded(a) for a in todo)))
+
+    def sweep_blocking(self, addresses):
+        """Für Worker-Threads: eigener Event-Loop pro Durchlauf."""
+        return asyncio.run(self.sweep(addresses))
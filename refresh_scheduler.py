@@ -0,0 +1,96 @@
+from PyQt5.QtCore import QObject, QTimer
+
+DEFAULT_INTERVAL = 60   # Sekunden
+MIN_INTERVAL = 15
+MAX_INTERVAL = 300
+BACKOFF_FACTOR = 1.5
+NEARLY_FULL_MARGIN = 2  # freie Plätze, ab denen ein Favorit als "fast voll" gilt
+
+def favorites_hot(old_servers, servers, favorites, margin=NEARLY_FULL_MARGIN):
+    """
+    True, wenn ein Favorit fast voll ist oder gerade wieder freie Plätze hat.
+    Dann lohnt es sich, öfter nachzusehen.
+    """
+    if not favorites:
+        return False
+    old_by_ip = {s.ip_address: s for s in old_servers if s.ip_address in favorites}
+    for s in servers:
+        ip = s.ip_address
+        if ip not in favorites:
+            continue
+        maxclients = s.maxclients
+        clients = s.clients
+        if not maxclients:
+            continue
+        if clients < maxclients and clients >= maxclients - margin:
+            return True
+        old = old_by_ip.get(ip)
+        if old and old.clients >= old.maxclients > clients:
+            return True
+    return False
+
+class RefreshScheduler(QObject):
+    """
+    Lädt die Serverliste periodisch neu. Ohne Änderungen wird das Intervall
+    schrittweise bis MAX_INTERVAL verlängert, bei "heißen" Favoriten auf
+    MIN_INTERVAL verkürzt. Es läuft nie mehr als ein Ladevorgang gleichzeitig,
+    und solange das Fenster minimiert ist, wird pausiert.
+    """
+
+    def __init__(self, start_load, base_interval=DEFAULT_INTERVAL,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, parent=None):
+        super().__init__(parent)
+        self.start_load = start_load
+        self.base_interval = base_interval
+        self.min_interval = min(min_interval, base_interval)
+        self.max_interval = max(max_interval, base_interval)
+        self.interval = base_interval
+        self.loading = False
+        self.paused = False
+        self._due = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timeout)
+
+    def start(self):
+        self._schedule()
+
+    def _schedule(self):
+        self._due = False
+        self.timer.start(int(self.interval * 1000))
+
+    def _on_timeout(self):
+        if self.paused:
+            # Beim Wiederherstellen des Fensters sofort nachholen
+            self._due = True
+            return
+        self.refresh_now()
+
+    def refresh_now(self):
+        """Startet einen Ladevorgang, falls gerade keiner läuft. Gibt True zurück, wenn gestartet."""
+        if self.loading:
+            return False
+        self.timer.stop()
+        self.loading = True
+        self.start_load()
+        return True
+
+    def load_finished(self, changed, hot=False):
+        self.loading = False
+        if hot:
+            self.interval = self.min_interval
+        elif changed:
+            self.interval = self.base_interval
+        else:
+            self.interval = min(self.interval * BACKOFF_FACTOR, self.max_interval)
+        self._schedule()
+
+    def pause(self):
+        if not self.paused:
+            self.paused = True
+
+    def resume(self):
+        if self.paused:
+            self.paused = False
+            if self._due:
+                self.refresh_now()
@@ -0,0 +1,134 @@
+import json
+import os
+
+from server_record import Server, FIELDS, share
+
+FORMAT = "nohesi-servers"
+VERSION = 1
+
+# Felder, die Tabelle, Filter und Sortierung brauchen; nur diese werden beim Start gelesen
+CORE_FIELDS = tuple(f for f in FIELDS if f != "tier3_cars")
+
+class _Extras:
+    """
+    Die restlichen Felder aller Server: die Zeile wird beim Start nur als
+    Bytes behalten und erst beim ersten Bedarf geparst. Die Datei selbst
+    wird nicht mehr geöffnet, ein neuer Cache kann sie also jederzeit ersetzen.
+    """
+
+    def __init__(self, line):
+        self._line = line
+        self._rows = None
+
+    def row(self, i):
+        if self._rows is None:
+            rows = None
+            try:
+                rows = json.loads(self._line)
+            except ValueError as e:
+                print(f"Fehler beim Nachladen des Server-Caches: {e}")
+            self._line = None
+            self._rows = rows if isinstance(rows, list) else []
+        row = self._rows[i] if i < len(self._rows) else None
+        return row if isinstance(row, dict) else {}
+
+class LazyServer(Server):
+    """
+    Server aus dem Cache: die CORE_FIELDS sind sofort da, tier3_cars wird
+    erst beim ersten Zugriff (oder Vergleich) nachgeladen. Ob es
+    tier3_cars gibt, steht schon im Kopf, das Tier ist also sofort bekannt.
+    """
+
+    __slots__ = ("_extras", "_index")
+
+    def __init__(self, extras, index, *values, **fields):
+        # extras nur bei Servern mit tier3_cars; bis zum Nachladen steht () als Platzhalter darin
+        super().__init__(*values, **fields)
+        self._extras = extras
+        self._index = index
+
+    @property
+    def tier3_cars(self):
+        extras = self._extras
+        if extras is not None:
+            self._extras = None
+            cars = extras.row(self._index).get("tier3_cars")
+            Server.tier3_cars.__set__(self, tuple(share(c, c) for c in cars) if cars is not None else ())
+        return Server.tier3_cars.__get__(self)
+
+    @tier3_cars.setter
+    def tier3_cars(self, value):
+        Server.tier3_cars.__set__(self, value)
+
+def write(path, servers):
+    """
+    Schreibt kompakt und atomar: Kopfzeile, eine Zeile mit den CORE_FIELDS
+    aller Server (als Listen, ohne wiederholte Schlüssel) und eine Zeile
+    mit den übrigen Feldern. Die Kopfzeile enthält den Byte-Offset der
+    letzten Zeile, damit der Start sie überspringen kann.
+    """
+    keysets = {}
+    core_rows = []
+    extra_rows = []
+    for s in servers:
+        extra = {"tier3_cars": s.tier3_cars} if s.tier3_cars is not None else {}
+        keyset_id = keysets.setdefault(tuple(extra), len(keysets))
+        core_rows.append([keyset_id] + [getattr(s, f) for f in CORE_FIELDS])
+        extra_rows.append(extra)
+    core_line = json.dumps(core_rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+    extra_line = json.dumps(extra_rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+    header = {"format": FORMAT, "version": VERSION, "count": len(core_rows),
+              "keysets": [[list(CORE_FIELDS), list(e)] for e in keysets]}
+    header_line = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        # Offset als feste Breite am Zeilenanfang, damit er vor dem Rest bekannt ist
+        f.write(b"%012d " % (13 + len(header_line) + len(core_line)))
+        f.write(header_line)
+        f.write(core_line)
+        f.write(extra_line)
+    os.replace(tmp, path)
+
+def read(path):
+    """
+    Parst nur Kopf und CORE_FIELDS, die letzte Zeile bleibt ungeparst im
+    Speicher. Gibt eine Liste von LazyServer zurück oder None, wenn die
+    Datei fehlt, kaputt ist oder ein anderes Format hat.
+    """
+    try:
+        with open(path, "rb") as f:
+            return _parse(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # Alles, was nicht passt (auch fehlende Schlüssel, falsche Typen, Zeilenlängen),
+        # darf den Start nicht verhindern; dann gilt der alte bzw. leere Cache
+        print(f"Server-Cache nicht lesbar: {e!r}")
+        return None
+
+def _parse(data):
+    offset = int(data[:13])
+    header_end = data.index(b"\n", 13) + 1
+    header = json.loads(data[13:header_end])
+    if header.get("format") != FORMAT or header.get("version") != VERSION:
+        return None
+    core_rows = json.loads(data[header_end:offset])
+    # present=None: alle CORE_FIELDS in der üblichen Reihenfolge, dann direkt positionell.
+    # Sonst nur bekannte Felder übernehmen (ältere Caches können mehr oder weniger enthalten).
+    keysets = [(None if tuple(present) == CORE_FIELDS else [f if f in CORE_FIELDS else None for f in present],
+                "tier3_cars" in extra)
+               for present, extra in header["keysets"]]
+    extras = _Extras(data[offset:])
+    servers = []
+    for i, row in enumerate(core_rows):
+        present, has_tier3_cars = keysets[row[0]]
+        lazy = extras if has_tier3_cars else None
+        tier3_cars = () if has_tier3_cars else None
+        if present is None:
+            if len(row) != len(CORE_FIELDS) + 1:
+                raise ValueError(f"Zeile {i}: {len(row) - 1} statt {len(CORE_FIELDS)} Felder")
+            servers.append(LazyServer(lazy, i, *row[1:], tier3_cars=tier3_cars))
+        else:
+            fields = {f: v for f, v in zip(present, row[1:]) if f is not None and v is not None}
+            servers.append(LazyServer(lazy, i, tier3_cars=tier3_cars, **fields))
+    return servers
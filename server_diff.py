@@ -0,0 +1,55 @@
+class ServerDiff:
+    def __init__(self, added, removed, changed):
+        self.added = added      # neue Server (server_record.Server)
+        self.removed = removed  # Schlüssel (ip_address) entfernter Server
+        self.changed = changed  # neue Server, deren Inhalt sich geändert hat
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return f"ServerDiff(+{len(self.added)} -{len(self.removed)} ~{len(self.changed)})"
+
+def diff_servers(old, new, key="ip_address"):
+    """
+    Vergleicht zwei Serverlisten anhand von key (Standard: ip_address) und
+    sortiert sie in hinzugekommene, entfernte und geänderte Server
+    (z.B. andere clients oder vip_slots).
+    """
+    old_by_key = {getattr(s, key): s for s in old}
+    new_keys = set()
+    added = []
+    changed = []
+    for s in new:
+        k = getattr(s, key)
+        new_keys.add(k)
+        previous = old_by_key.get(k)
+        if previous is None:
+            added.append(s)
+        elif previous != s:
+            changed.append(s)
+    removed = [k for k in old_by_key if k not in new_keys]
+    return ServerDiff(added, removed, changed)
+
+def merge_servers(current, batch, key="ip_address"):
+    """
+    Übernimmt eine Teilliste (z.B. eine Seite) in current: vorhandene Server
+    werden ersetzt, neue hinten angehängt, entfernt wird nichts. Gibt die
+    neue Liste und den ServerDiff dazu zurück.
+    """
+    positions = {getattr(s, key): i for i, s in enumerate(current)}
+    merged = list(current)
+    added = []
+    changed = []
+    for s in batch:
+        k = getattr(s, key)
+        i = positions.get(k)
+        if i is None:
+            positions[k] = len(merged)
+            merged.append(s)
+            added.append(s)
+        else:
+            if merged[i] != s:
+                changed.append(s)
+            merged[i] = s
+    return merged, ServerDiff(added, [], changed)
@@ -0,0 +1,75 @@
+from collections import defaultdict
+
+INDEXED_FIELDS = ("region", "density", "type", "map")
+
+class ServerIndex:
+    """
+    Invertierte Indizes Feldwert -> Menge von Server-Schlüsseln (ip_address)
+    für die Filter-Combos. Filterkombinationen werden zu Schnittmengen,
+    die Werte pro Combo samt Anzahl liegen fertig vor.
+    """
+
+    def __init__(self, servers=(), key="ip_address", fields=INDEXED_FIELDS):
+        self.key = key
+        self.fields = fields
+        self.version = 0
+        self.rebuild(servers)
+
+    def rebuild(self, servers):
+        self._index = {f: defaultdict(set) for f in self.fields}
+        self._values_by_key = {}
+        for s in servers:
+            self._add(s)
+        self.version += 1
+
+    def _add(self, s):
+        k = getattr(s, self.key)
+        values = tuple(getattr(s, f) for f in self.fields)
+        self._values_by_key[k] = values
+        for f, v in zip(self.fields, values):
+            self._index[f][v].add(k)
+
+    def _remove(self, k):
+        values = self._values_by_key.pop(k, None)
+        if values is None:
+            return
+        for f, v in zip(self.fields, values):
+            keys = self._index[f].get(v)
+            if keys is not None:
+                keys.discard(k)
+                if not keys:
+                    del self._index[f][v]
+
+    def apply_diff(self, diff):
+        """Aktualisiert nur die Einträge aus einem server_diff.ServerDiff."""
+        for k in diff.removed:
+            self._remove(k)
+        for s in diff.changed:
+            k = getattr(s, self.key)
+            if self._values_by_key.get(k) != tuple(getattr(s, f) for f in self.fields):
+                self._remove(k)
+                self._add(s)
+        for s in diff.added:
+            self._add(s)
+        self.version += 1
+
+    def lookup(self, filters):
+        """
+        filters: Feld -> Wert (None = alle). Gibt die Menge passender Schlüssel
+        zurück oder None, wenn nichts eingeschränkt ist.
+        """
+        result = None
+        # Kleinste Menge zuerst, dann bleibt die Schnittmenge klein
+        sets = sorted((self._index[f].get(v, set()) for f, v in filters.items() if v is not None), key=len)
+        for keys in sets:
+            result = set(keys) if result is None else result & keys
+            if not result:
+                break
+        return result
+
+    def values(self, field):
+        """Sortierte Liste (Wert, Anzahl) ohne leere Werte."""
+        return sorted((v, len(keys)) for v, keys in self._index[field].items() if v)
+
+    def __len__(self):
+        return len(self._values_by_key)
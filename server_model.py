@@ -0,0 +1,251 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QSortFilterProxyModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+# Spalte -> Attribut von server_record.Server bzw. abgeleiteter Wert (favorite, tier, vip, ping)
+COLUMNS = ["favorite", "name", "ip_address", "region", "map", "clients", "density", "type", "tier", "vip", "ping"]
+COL_FAVORITE = 0
+COL_PLAYERS = 5
+COL_PING = 10
+
+SERVER_ROLE = Qt.UserRole
+
+class ServerTableModel(QAbstractTableModel):
+    """
+    Tabellenmodell über die Serverliste. Zellinhalte werden erst erzeugt,
+    wenn die View sie anfragt; Filter und Sortierung übernimmt ServerFilterProxy.
+    """
+
+    def __init__(self, favorites, tr, parent=None):
+        super().__init__(parent)
+        self.servers = []
+        self.favorites = favorites
+        self.tr = tr
+        self.dark = False
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+        self._api_order = []
+        self._rows_by_ip = {}
+        self.pings = {}  # ip_address -> ms (None = nicht erreichbar), siehe ping_probe
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.servers)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return [
+                "★", self.tr.get("Name", "Name"), self.tr.get("IP", "IP"),
+                self.tr.get("Region", "Region"), self.tr.get("Map", "Map"),
+                self.tr.get("Players", "Players"), self.tr.get("Traffic", "Traffic"),
+                self.tr.get("Type", "Type"), "Tier", "VIP", "Ping"
+            ][section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        s = self.servers[index.row()]
+        col = index.column()
+        if role == Qt.DisplayRole:
+            return self.display_text(s, col)
+        if role == SERVER_ROLE:
+            return s
+        if role == Qt.TextAlignmentRole and col == COL_FAVORITE:
+            return Qt.AlignCenter
+        if role == Qt.TextAlignmentRole and col == COL_PING:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.BackgroundRole and col == COL_FAVORITE and self.dark:
+            return QColor("#2b2b2b")
+        return None
+
+    def display_text(self, s, col):
+        key = COLUMNS[col]
+        if key == "favorite":
+            return "★" if s.ip_address in self.favorites else "☆"
+        if key == "clients":
+            return s.players_text
+        if key == "tier":
+            return s.tier
+        if key == "vip":
+            return s.vip_text
+        if key == "ping":
+            ip = s.ip_address
+            if ip not in self.pings:
+                return ""
+            ms = self.pings[ip]
+            return "–" if ms is None else f"{ms:.0f} ms"
+        value = getattr(s, key)
+        return self.tr.get(value, value)
+
+    def set_servers(self, servers):
+        self.beginResetModel()
+        self._api_order = list(servers)
+        self.servers = self._sorted(self._api_order)
+        self._reindex()
+        self.endResetModel()
+
+    def apply_diff(self, servers, diff):
+        """
+        Übernimmt eine neue Serverliste, meldet der View aber nur die
+        Unterschiede aus diff (server_diff.diff_servers): entfernte Zeilen,
+        geänderte Zeilen und neue Zeilen. Auswahl und Scrollposition bleiben erhalten.
+        """
+        # Entfernen von hinten nach vorne in zusammenhängenden Blöcken
+        rows = sorted((self._rows_by_ip[k] for k in diff.removed if k in self._rows_by_ip), reverse=True)
+        while rows:
+            last = first = rows.pop(0)
+            while rows and rows[0] == first - 1:
+                first = rows.pop(0)
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.servers[first:last + 1]
+            self.endRemoveRows()
+        self._reindex()
+
+        new_by_ip = {s.ip_address: s for s in servers}
+        changed = {s.ip_address for s in diff.changed}
+        # Unveränderte Zeilen still auf die neuen (gleichen) Server umstellen
+        for row, s in enumerate(self.servers):
+            self.servers[row] = new_by_ip.get(s.ip_address, s)
+        for ip in changed:
+            row = self._rows_by_ip.get(ip)
+            if row is not None:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+
+        if diff.added:
+            first = len(self.servers)
+            self.beginInsertRows(QModelIndex(), first, first + len(diff.added) - 1)
+            self.servers.extend(diff.added)
+            self.endInsertRows()
+
+        self._api_order = list(servers)
+        ordered = self._sorted(self._api_order)
+        if any(a is not b for a, b in zip(self.servers, ordered)):
+            self._apply_order(ordered)
+        else:
+            self._reindex()
+
+    def _reindex(self):
+        self._rows_by_ip = {s.ip_address: row for row, s in enumerate(self.servers)}
+
+    def _sorted(self, servers):
+        if self.sort_column < 0:
+            return list(servers)
+        if self.sort_column == COL_PLAYERS:
+            key = lambda s: s.clients
+        elif self.sort_column == COL_PING:
+            # Ohne Messwert immer ans Ende, egal in welcher Richtung
+            pings = self.pings
+            measured = [s for s in servers if pings.get(s.ip_address) is not None]
+            missing = [s for s in servers if pings.get(s.ip_address) is None]
+            measured.sort(key=lambda s: pings[s.ip_address], reverse=self.sort_order == Qt.DescendingOrder)
+            return measured + missing
+        else:
+            key = lambda s, col=self.sort_column: self.display_text(s, col)
+        # stabil, gleiche Werte behalten die Reihenfolge der API
+        return sorted(servers, key=key, reverse=self.sort_order == Qt.DescendingOrder)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        Sortiert in Python über einen Schlüssel pro Zeile statt über
+        Vergleiche pro Zeilenpaar (die bei QSortFilterProxyModel jeweils
+        zwei Python-Aufrufe von data() kosten). column < 0 = API-Reihenfolge.
+        """
+        self.sort_column = column
+        self.sort_order = order
+        self._apply_order(self._sorted(self._api_order))
+
+    def _apply_order(self, ordered):
+        self.layoutAboutToBeChanged.emit()
+        old_rows = {id(s): row for row, s in enumerate(self.servers)}
+        self.servers = ordered
+        self._reindex()
+        new_rows = [0] * len(self.servers)
+        for row, s in enumerate(self.servers):
+            new_rows[old_rows[id(s)]] = row
+        for index in self.persistentIndexList():
+            self.changePersistentIndex(index, self.index(new_rows[index.row()], index.column()))
+        self.layoutChanged.emit()
+
+    def row_for_ip(self, ip):
+        return self._rows_by_ip.get(ip, -1)
+
+    def set_pings(self, pings):
+        """Übernimmt neue Messwerte {ip_address: ms}; zeichnet nur die Ping-Spalte neu."""
+        if not pings:
+            return
+        self.pings.update(pings)
+        if self.sort_column == COL_PING:
+            self._apply_order(self._sorted(self._api_order))
+        elif self.servers:
+            self.dataChanged.emit(self.index(0, COL_PING), self.index(len(self.servers) - 1, COL_PING))
+
+    def favorite_changed(self, ip):
+        # Nur die eine Zelle neu zeichnen statt die ganze Tabelle
+        row = self.row_for_ip(ip)
+        if row >= 0:
+            index = self.index(row, COL_FAVORITE)
+            self.dataChanged.emit(index, index)
+
+    def set_translations(self, tr):
+        self.tr = tr
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(COLUMNS) - 1)
+        if self.servers:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.servers) - 1, len(COLUMNS) - 1))
+
+    def set_dark(self, dark):
+        if dark != self.dark:
+            self.dark = dark
+            if self.servers:
+                self.dataChanged.emit(self.index(0, COL_FAVORITE), self.index(len(self.servers) - 1, COL_FAVORITE))
+
+class ServerFilterProxy(QSortFilterProxyModel):
+    """
+    Filtert nach Region/Verkehr/Typ/Karte über den ServerIndex, dazu nach
+    Favoriten und (optional) einer Menge erlaubter IPs aus dem Car-Filter.
+    None bedeutet "alle".
+    """
+
+    def __init__(self, server_index, parent=None):
+        super().__init__(parent)
+        # Geänderte Zeilen neu filtern; sortiert wird ohnehin im Quellmodell
+        self.setDynamicSortFilter(True)
+        self.server_index = server_index
+        self.field_filters = {}
+        self.only_ips = None
+        self._allowed = None
+        self._allowed_version = None
+
+    def set_filters(self, field_filters, only_ips=None):
+        field_filters = {k: v for k, v in field_filters.items() if v is not None}
+        if field_filters == self.field_filters and only_ips == self.only_ips:
+            return
+        self.field_filters = field_filters
+        self.only_ips = only_ips
+        self._allowed_version = None
+        self.invalidateFilter()
+
+    def allowed_ips(self):
+        # Schnittmenge aus Index und IP-Filter, neu berechnet sobald sich der Index ändert
+        if self._allowed_version != self.server_index.version:
+            allowed = self.server_index.lookup(self.field_filters)
+            if self.only_ips is not None:
+                allowed = set(self.only_ips) if allowed is None else allowed & self.only_ips
+            self._allowed = allowed
+            self._allowed_version = self.server_index.version
+        return self._allowed
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        allowed = self.allowed_ips()
+        return allowed is None or self.sourceModel().servers[source_row].ip_address in allowed
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Das Sortieren übernimmt das Quellmodell, der Proxy behält dessen Reihenfolge
+        self.sourceModel().sort(column, order)
+
+    def server_at(self, row):
+        return self.index(row, 0).data(SERVER_ROLE)
@@ -0,0 +1,64 @@
+# Felder aus der Hub-Antwort, die der Browser nutzt; alles andere wird beim Parsen verworfen
+FIELDS = ("name", "ip_address", "region", "map", "clients", "maxclients",
+          "density", "type", "vip_slots", "max_vip_slots", "tier3_cars")
+
+# region, map, density, type und Car-Namen: wenige verschiedene Werte über tausende Server.
+# Wie sys.intern, aber auch für Nicht-Strings, falls der Hub z.B. eine Zahl schickt.
+_shared = {}
+share = _shared.setdefault
+
+def server_tier(server_type, tier3_cars):
+    if isinstance(server_type, str) and server_type.lower().startswith("tier"):
+        # "Tier2", "tier2", "Tier 2" -> "2"
+        return server_type[4:].strip()
+    elif tier3_cars is not None:
+        return "3"
+    return ""
+
+class Server:
+    """
+    Ein Server aus der Hub-Liste. Nur die genutzten Felder, wiederholte
+    Strings geteilt, dazu die Anzeigetexte (Tier, Spieler, VIP), die
+    sonst bei jedem Zeichnen und Sortieren neu gebaut würden.
+    """
+
+    __slots__ = FIELDS + ("tier", "players_text", "vip_text")
+
+    def __init__(self, name="", ip_address="", region="", map="", clients=0, maxclients=0,
+                 density="", type="", vip_slots=0, max_vip_slots=0, tier3_cars=None):
+        self.name = name
+        self.ip_address = ip_address
+        self.region = share(region, region)
+        self.map = share(map, map)
+        self.clients = clients
+        self.maxclients = maxclients
+        self.density = share(density, density)
+        self.type = share(type, type)
+        self.vip_slots = vip_slots
+        self.max_vip_slots = max_vip_slots
+        self.tier3_cars = tuple(share(c, c) for c in tier3_cars) if tier3_cars is not None else None
+        self.tier = server_tier(type, tier3_cars)
+        self.players_text = f"{clients}/{maxclients}"
+        self.vip_text = f"{vip_slots}/{max_vip_slots}" if max_vip_slots else str(vip_slots)
+
+    @classmethod
+    def from_api(cls, data):
+        """Aus einem Server-Dict des Hubs (oder des alten Caches), fehlende Felder mit Standardwerten."""
+        return cls(**{f: data[f] for f in FIELDS if data.get(f) is not None})
+
+    def values(self):
+        return tuple(getattr(self, f) for f in FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, Server):
+            return NotImplemented
+        return self.values() == other.values()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Server({self.name!r}, {self.ip_address!r})"
+
+def parse_servers(items):
+    """Liste von API-Dicts -> Liste von Server. Läuft im Worker-Thread."""
+    return [Server.from_api(d) for d in items]
@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+# Enthält "br", sobald brotli/brotlicffi installiert ist (urllib3 dekodiert dann selbst)
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) in Sekunden
+RETRY_STATUS = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+class Transport:
+    """
+    Gemeinsame HTTP-Session pro Gegenstelle (Hub, Friends-Server):
+    Connection-Pool mit Keep-Alive, gzip/brotli, Timeouts pro Endpunkt
+    und Retry mit Jitter-Backoff. Zählt Requests, Verbindungen und Bytes.
+    """
+
+    def __init__(self, name, timeouts=None, default_timeout=DEFAULT_TIMEOUT,
+                 retries=2, backoff=0.3, pool_maxsize=8):
+        self.name = name
+        # Pfad-Präfix -> Timeout, der längste passende Präfix gewinnt
+        self.timeouts = sorted((timeouts or {}).items(), key=lambda kv: len(kv[0]), reverse=True)
+        self.default_timeout = default_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._adapter = adapter
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "bytes_sent": 0,
+                       "bytes_received": 0, "bytes_decoded": 0}
+
+    def timeout_for(self, url):
+        path = urlsplit(url).path
+        for prefix, timeout in self.timeouts:
+            if path.startswith(prefix):
+                return timeout
+        return self.default_timeout
+
+    def _sleep_backoff(self, attempt):
+        # Exponentiell mit vollem Jitter, damit viele Clients nicht im Gleichtakt wiederholen
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def request(self, method, url, timeout=None, **kwargs):
+        method = method.upper()
+        timeout = timeout if timeout is not None else self.timeout_for(url)
+        idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            try:
+                resp = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # Nicht-idempotente Requests nur wiederholen, wenn sie den Server sicher nicht erreicht haben
+                retryable = idempotent or isinstance(e, requests.ConnectTimeout)
+                if not retryable or attempt >= self.retries:
+                    raise
+            else:
+                if not (idempotent and resp.status_code in RETRY_STATUS and attempt < self.retries):
+                    self._account(resp, streamed=kwargs.get("stream", False))
+                    return resp
+                resp.close()
+            with self._lock:
+                self._stats["retries"] += 1
+            self._sleep_backoff(attempt)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def _account(self, resp, streamed=False):
+        body = resp.request.body or b""
+        if streamed:
+            # Body gehört dem Aufrufer (z.B. Event-Stream), nur den Request zählen
+            with self._lock:
+                self._stats["requests"] += 1
+                self._stats["bytes_sent"] += len(body)
+            return
+        content = resp.content  # liest den Body vollständig, damit raw.tell() stimmt
+        try:
+            wire_bytes = resp.raw.tell()
+        except Exception:
+            wire_bytes = len(content)
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["bytes_sent"] += len(body)
+            self._stats["bytes_received"] += wire_bytes
+            self._stats["bytes_decoded"] += len(content)
+
+    def stats(self):
+        """
+        Zähler für Latenz-Messungen. reused_connections = Requests, die über
+        eine bereits offene Keep-Alive-Verbindung liefen.
+        """
+        new_connections = 0
+        pool_requests = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                new_connections += pool.num_connections
+                pool_requests += pool.num_requests
+        with self._lock:
+            stats = dict(self._stats)
+        stats["new_connections"] = new_connections
+        stats["reused_connections"] = max(0, pool_requests - new_connections)
+        return stats
+
+    def close(self):
+        self.session.close()
+
+hub_transport = Transport("hub", timeouts={
+    "/servers/cars": (3.05, 20),
+    "/servers": (3.05, 10),
+})
+
+friends_transport = Transport("friends", timeouts={
+    "/status": (2, 5),
+    "/sync": (3.05, 8),
+    "/friends/events": (3.05, 45),  # Server schickt alle 15 s ein Keepalive
+    "/friends": (3.05, 8),
+    "/register": (3.05, 8),
+})
@@ -0,0 +1,47 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TtlLruCache:
+    """
+    Kleiner LRU-Cache mit TTL. Abgelaufene Einträge werden nicht sofort
+    entfernt, sondern als "stale" gemeldet, damit der Aufrufer sie weiter
+    anzeigen und im Hintergrund neu laden kann (stale-while-revalidate).
+    """
+
+    def __init__(self, maxsize=32, ttl=120, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Gibt (value, fresh) zurück oder None, wenn nichts gespeichert ist."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            self._data.move_to_end(key)
+            value, stored_at = item
+            return value, self._clock() - stored_at < self.ttl
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, self._clock())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data